@@ -1,22 +1,195 @@
 # File: backend/app.py
-from flask import Flask, request, jsonify
-from transformers import AutoTokenizer, AutoModelForCausalLM
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import TimeoutError
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from transformers import TextIteratorStreamer
 from flask_cors import CORS
+from inference_profiles import apply_profile, configure_threads, warm_up
+from inference_worker import InferenceWorker, WorkerBusy
+from model_loader import load_model
+from precompute_roadmaps import length_sorted_batches, read_jsonl, seed_cache, validate_request
+from roadmap_cache import RoadmapCache, cache_namespace
+from stage_metrics import StageMetrics
+from roadmap_generation import (
+    DECODING_PRESETS,
+    DEFAULT_PRESET,
+    STREAMING_PRESET,
+    GenerationBudget,
+    build_prompt,
+    decoding_variant,
+    generate_roadmaps,
+    generate_tokens,
+)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS to allow frontend requests from different origins
 
-# Load the fine-tuned model from Hugging Face
-model_name = "asthaaa300/results"  # Replace with your Hugging Face model repository name
-print("Loading model and tokenizer...")
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForCausalLM.from_pretrained(model_name)
-print("Model and tokenizer loaded successfully.")
+# Load the fine-tuned model from Hugging Face, or from a local snapshot directory
+model_name = os.getenv("ROADMAP_MODEL_PATH") or "asthaaa300/results"  # Replace with your Hugging Face model repository name
+mmap_weights = os.getenv("ROADMAP_MODEL_MMAP", "0") == "1"
+
+# CPU inference profile (fp32, bf16 or int8) and torch thread counts
+inference_profile = os.getenv("ROADMAP_PROFILE", "fp32")
+configure_threads(os.getenv("ROADMAP_NUM_THREADS"), os.getenv("ROADMAP_INTEROP_THREADS"))
+
+# Upper bounds on what a single request may spend on generation
+max_new_tokens_limit = int(os.getenv("ROADMAP_MAX_NEW_TOKENS", "280"))
+max_seconds_limit = float(os.getenv("ROADMAP_MAX_SECONDS", "60"))
+
+# Opt-in per-stage timers, exposed on /metrics in the Prometheus text format
+metrics = StageMetrics(enabled=os.getenv("ROADMAP_METRICS", "0") == "1", prefix="roadmap")
+
+# The model is loaded in the background so the server can bind immediately
+tokenizer = None
+model = None
+model_ready = threading.Event()
+model_error = None
+_loader_lock = threading.Lock()
+_loader_thread = None
+
+def load_model_in_background():
+    global tokenizer, model, model_error
+    try:
+        print("Loading model and tokenizer...")
+        with metrics.time("model_load"):
+            loaded_tokenizer, loaded_model = load_model(model_name, mmap_weights=mmap_weights)
+            loaded_model = apply_profile(loaded_model, inference_profile)
+        # Warm up so that the first real request does not pay for lazy initialization
+        with metrics.time("warm_up"):
+            warm_up(loaded_tokenizer, loaded_model)
+        tokenizer, model = loaded_tokenizer, loaded_model
+        model_ready.set()
+        print(f"Model and tokenizer loaded successfully ({inference_profile} profile).")
+    except Exception as e:
+        model_error = str(e)
+        print(f"Error loading model: {e}")
+
+def start_model_loader():
+    global _loader_thread
+    with _loader_lock:
+        if _loader_thread is None:
+            _loader_thread = threading.Thread(target=load_model_in_background, name="model-loader", daemon=True)
+            _loader_thread.start()
+
+def model_unavailable():
+    if model_error:
+        return jsonify({"error": "The roadmap model failed to load."}), 503
+    response = jsonify({"error": "The roadmap model is still loading. Please retry shortly."})
+    response.headers["Retry-After"] = os.getenv("ROADMAP_RETRY_AFTER", "10")
+    return response, 503
+
+# Pick the decoding preset and clamp the client's budget to the server limits
+def resolve_decoding(user_input):
+    preset = user_input.get("preset") or DEFAULT_PRESET
+    if preset not in DECODING_PRESETS:
+        raise ValueError(f"Unknown preset '{preset}'. Choose one of: {', '.join(sorted(DECODING_PRESETS))}.")
+    try:
+        max_new_tokens = user_input.get("max_new_tokens")
+        max_new_tokens = max_new_tokens_limit if max_new_tokens is None else int(max_new_tokens)
+        max_seconds = user_input.get("max_seconds")
+        max_seconds = max_seconds_limit if max_seconds is None else float(max_seconds)
+    except (TypeError, ValueError):
+        raise ValueError("max_new_tokens and max_seconds must be numbers.")
+    if max_new_tokens <= 0 or max_seconds <= 0:
+        raise ValueError("max_new_tokens and max_seconds must be positive.")
+    return preset, min(max_new_tokens, max_new_tokens_limit), min(max_seconds, max_seconds_limit)
+
+def worker_busy():
+    response = jsonify({"error": "The server is busy generating other roadmaps. Please retry shortly."})
+    response.headers["Retry-After"] = os.getenv("ROADMAP_RETRY_AFTER", "10")
+    return response, 429
+
+# A streaming request is its own job: the worker feeds the streamer instead of returning text
+StreamingJob = namedtuple("StreamingJob", ["streamer", "budget"])
+
+def generate_batch(prompts, job, should_stop):
+    if isinstance(job, StreamingJob):
+        job.budget.should_stop = should_stop
+        try:
+            with metrics.time("generate_stream"):
+                generate_tokens(
+                    tokenizer,
+                    model,
+                    prompts,
+                    budget=job.budget,
+                    streamer=job.streamer,
+                    **DECODING_PRESETS[STREAMING_PRESET]
+                )
+        except Exception:
+            job.streamer.end()
+            raise
+        return [None]
+
+    preset, max_new_tokens, max_seconds = job
+    with metrics.time("generate"):
+        roadmaps, timed_out = generate_roadmaps(tokenizer, model, prompts, preset, max_new_tokens, max_seconds, should_stop)
+    metrics.count("generated_roadmaps", len(roadmaps))
+    return [(roadmap, timed_out) for roadmap in roadmaps]
+
+# All generation runs on one model-owning worker thread. Concurrent requests are queued
+# for a few milliseconds and decoded together; a full queue is answered with 429.
+worker = InferenceWorker(
+    generate_batch,
+    max_batch_size=int(os.getenv("ROADMAP_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("ROADMAP_BATCH_WAIT_MS", "5")),
+    max_queue_size=int(os.getenv("ROADMAP_QUEUE_SIZE", "64")),
+)
+# How long a request waits for its roadmap (queueing included) before giving up
+request_timeout = float(os.getenv("ROADMAP_REQUEST_TIMEOUT", "120"))
+
+# Decoding is deterministic, so repeated requests are served from the cache
+roadmap_cache = RoadmapCache(
+    max_entries=int(os.getenv("ROADMAP_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("ROADMAP_CACHE_TTL", str(24 * 3600))),
+    db_path=os.getenv("ROADMAP_CACHE_DB") or None,
+    namespace=cache_namespace(model_name, inference_profile),
+)
+
+# Optionally warm the cache with roadmaps precomputed by precompute_roadmaps.py for
+# the same model and profile
+if os.getenv("ROADMAP_CACHE_SEED"):
+    with open(os.getenv("ROADMAP_CACHE_SEED"), encoding="utf-8") as seed_file:
+        seeded, skipped = seed_cache(roadmap_cache, read_jsonl(seed_file))
+    print(f"Seeded roadmap cache with {seeded} roadmaps ({skipped} from another model or profile skipped).")
+    # Without a database the seed lives only in the in-memory LRU
+    if not os.getenv("ROADMAP_CACHE_DB") and seeded > roadmap_cache.max_entries:
+        print(f"Warning: only the last {roadmap_cache.max_entries} seeded roadmaps fit in the cache; "
+              "raise ROADMAP_CACHE_SIZE or set ROADMAP_CACHE_DB to keep them all.")
+
+# Limit for /generate-roadmap/batch
+bulk_max_items = int(os.getenv("ROADMAP_BULK_MAX_ITEMS", "1000"))
+
+# Request latency per endpoint (time to the first byte for streamed responses)
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def stop_request_timer(response):
+    if metrics.enabled and request.endpoint and "request_started" in g:
+        metrics.observe(f"request_{request.endpoint}", time.perf_counter() - g.request_started)
+    return response
 
 @app.route("/")
 def home():
     return jsonify({"message": "Welcome to the Roadmap Generator API!"})
 
+@app.route("/healthz")
+def healthz():
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz")
+def readyz():
+    if model_ready.is_set():
+        return jsonify({"status": "ready", "model": model_name})
+    if model_error:
+        return jsonify({"status": "failed", "error": model_error}), 503
+    return jsonify({"status": "loading"}), 503
+
 @app.route("/generate-roadmap", methods=["POST"])
 def generate_roadmap():
     try:
@@ -30,25 +203,37 @@ def generate_roadmap():
         if not career_goal or not skills or not learning_preference:
             return jsonify({"error": "All fields (career_goal, skills, learning_preference) are required."}), 400
 
+        try:
+            decoding = resolve_decoding(user_input)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        preset, max_new_tokens, _ = decoding
+
         # Build the input prompt
-        prompt = (
-            f"Career Goal: {career_goal}\n"
-            f"Skills: {', '.join(skills)}\n"
-            f"Learning Preference: {learning_preference}\n"
-            f"Roadmap:"
-        )
-        
+        prompt = build_prompt(career_goal, skills, learning_preference)
+
+        # Serve repeated requests from the cache
+        cache_key = roadmap_cache.key(career_goal, skills, learning_preference, decoding_variant(preset, max_new_tokens))
+        with metrics.time("cache_lookup"):
+            roadmap = roadmap_cache.get(cache_key)
+        if roadmap is not None:
+            return jsonify({"roadmap": roadmap})
+
+        if not model_ready.is_set():
+            return model_unavailable()
+
         # Generate the roadmap
-        print("Generating roadmap...")
-        inputs = tokenizer(prompt, return_tensors="pt")
-        outputs = model.generate(
-            inputs.input_ids,
-            max_length=300,
-            num_beams=4,
-            early_stopping=True,
-            no_repeat_ngram_size=2  # Prevent repetitive outputs
-        )
-        roadmap = tokenizer.decode(outputs[0], skip_special_tokens=True)
+        print(f"Generating roadmap ({preset})...")
+        try:
+            with metrics.time("inference"):
+                roadmap, timed_out = worker.generate(prompt, decoding, timeout=request_timeout)
+        except WorkerBusy:
+            return worker_busy()
+        except TimeoutError:
+            return jsonify({"error": "Timed out while generating the roadmap."}), 504
+        # Roadmaps cut short by the time budget depend on load, so they are not cached
+        if not timed_out:
+            roadmap_cache.set(cache_key, roadmap)
         print("Roadmap generated successfully.")
 
         # Return the generated roadmap
@@ -58,5 +243,180 @@ def generate_roadmap():
         print(f"Error occurred: {e}")
         return jsonify({"error": "An error occurred while generating the roadmap."}), 500
 
+def sse_event(data, event=None):
+    message = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{message}" if event else message
+
+@app.route("/generate-roadmap/stream", methods=["POST"])
+def generate_roadmap_stream():
+    user_input = request.json or {}
+    career_goal = user_input.get("career_goal", "")
+    skills = user_input.get("skills", [])
+    learning_preference = user_input.get("learning_preference", "")
+
+    # Validate inputs
+    if not career_goal or not skills or not learning_preference:
+        return jsonify({"error": "All fields (career_goal, skills, learning_preference) are required."}), 400
+
+    try:
+        _, max_new_tokens, max_seconds = resolve_decoding(user_input)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stream_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    # A cached roadmap is sent as a single token event
+    cache_key = roadmap_cache.key(
+        career_goal, skills, learning_preference, decoding_variant(STREAMING_PRESET, max_new_tokens)
+    )
+    roadmap = roadmap_cache.get(cache_key)
+    if roadmap is not None:
+        def cached_events():
+            yield sse_event({"token": roadmap})
+            yield sse_event({}, event="done")
+        return Response(cached_events(), mimetype="text/event-stream", headers=stream_headers)
+
+    if not model_ready.is_set():
+        return model_unavailable()
+
+    prompt = build_prompt(career_goal, skills, learning_preference)
+
+    # Beam search cannot emit partial hypotheses, so the stream always decodes with the
+    # greedy preset (within the request's budget) and forwards text as soon as the
+    # tokenizer yields it
+    streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True, timeout=request_timeout)
+    budget = GenerationBudget(max_new_tokens, max_seconds)
+    try:
+        job = worker.submit(prompt, StreamingJob(streamer, budget))
+    except WorkerBusy:
+        return worker_busy()
+
+    def events():
+        finished = False
+        pieces = []
+        try:
+            for text in streamer:
+                if text:
+                    pieces.append(text)
+                    yield sse_event({"token": text})
+            job.result(timeout=request_timeout)
+            finished = True
+            # Roadmaps cut short by the time budget depend on load, so they are not cached
+            if not budget.timed_out:
+                roadmap_cache.set(cache_key, "".join(pieces))
+            yield sse_event({}, event="done")
+        except Exception as e:
+            print(f"Error occurred: {e}")
+            yield sse_event({"error": "An error occurred while generating the roadmap."}, event="error")
+        finally:
+            # Also runs when the client disconnects, which stops the generation
+            if not finished:
+                job.cancel()
+
+    print("Streaming roadmap...")
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=stream_headers)
+
+# Accepts JSONL (one request per line) or a JSON list and streams JSONL results back.
+# Decoding settings come from the query string, e.g. ?preset=fast.
+@app.route("/generate-roadmap/batch", methods=["POST"])
+def generate_roadmap_batch():
+    try:
+        if request.is_json:
+            items = request.get_json()
+            items = items.get("requests", []) if isinstance(items, dict) else items
+        else:
+            items = list(read_jsonl(request.get_data(as_text=True).splitlines()))
+        if not isinstance(items, list):
+            raise ValueError("Expected a list of requests.")
+        items = [validate_request(item) for item in items]
+        preset, max_new_tokens, max_seconds = resolve_decoding(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if len(items) > bulk_max_items:
+        return jsonify({"error": f"At most {bulk_max_items} requests are accepted per batch."}), 413
+
+    variant = decoding_variant(preset, max_new_tokens)
+    keys = [roadmap_cache.key(item["career_goal"], item["skills"], item["learning_preference"], variant) for item in items]
+    cached = {index: roadmap_cache.get(key) for index, key in enumerate(keys)}
+    missing = [index for index, roadmap in cached.items() if roadmap is None]
+    if missing and not model_ready.is_set():
+        return model_unavailable()
+
+    def results(jobs):
+        for index, job in jobs:
+            try:
+                roadmap, timed_out = job.result()
+            except Exception as e:
+                print(f"Error occurred: {e}")
+                yield json.dumps({"index": index, "error": "An error occurred while generating the roadmap."}) + "\n"
+                continue
+            if not timed_out:
+                roadmap_cache.set(keys[index], roadmap)
+            yield json.dumps({"index": index, "roadmap": roadmap}) + "\n"
+
+    def records():
+        for index, roadmap in cached.items():
+            if roadmap is not None:
+                yield json.dumps({"index": index, "roadmap": roadmap}) + "\n"
+
+        # Feed the worker one length-sorted chunk ahead of the results being streamed.
+        # Bulk submissions wait for queue space instead of being rejected.
+        misses = [items[index] for index in missing]
+        if not misses:
+            return
+        decoding = (preset, max_new_tokens, max_seconds)
+        previous, current = [], []
+        try:
+            for positions, _, prompts in length_sorted_batches(tokenizer, misses, worker.max_batch_size):
+                current = [
+                    (missing[position], worker.submit(prompt, decoding, block=True))
+                    for position, prompt in zip(positions, prompts)
+                ]
+                yield from results(previous)
+                previous = current
+            yield from results(previous)
+        finally:
+            # Drop whatever is still queued if the client goes away, including the chunk
+            # submitted just before the disconnect
+            for _, job in previous + current:
+                job.cancel()
+
+    print(f"Generating {len(missing)} of {len(items)} roadmaps in bulk ({preset})...")
+    return Response(stream_with_context(records()), mimetype="application/x-ndjson")
+
+@app.route("/cache-stats")
+def cache_stats():
+    return jsonify(roadmap_cache.stats())
+
+@app.route("/inference-stats")
+def inference_stats():
+    return jsonify(worker.stats())
+
+@app.route("/metrics")
+def prometheus_metrics():
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled; set ROADMAP_METRICS=1 to enable them."}), 404
+    # Only the point-in-time values are gauges; averages, maxima and ratios are left
+    # to the scraper (rate() over the counters) and stay in /inference-stats and /cache-stats
+    worker_stats, lookup_stats = worker.stats(), roadmap_cache.stats()
+    gauges = {
+        "model_ready": model_ready.is_set(),
+        "inference_queue_depth": worker_stats["queue_depth"],
+        "inference_queue_capacity": worker_stats["queue_capacity"],
+    }
+    counters = {
+        f"inference_{name}": worker_stats[name]
+        for name in ("submitted", "rejected", "cancelled", "completed", "failed", "batches",
+                     "wait_seconds_total", "service_seconds_total")
+    }
+    counters.update({f"cache_{name}": lookup_stats[name] for name in ("memory_hits", "disk_hits", "misses", "evictions")})
+    return Response(metrics.render(gauges, counters), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    # Under the debug reloader only the serving child process loads the model
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_model_loader()
     app.run(debug=True)
+else:
+    # When imported by a WSGI server, start loading right away
+    start_model_loader()
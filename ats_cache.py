@@ -0,0 +1,32 @@
+import hashlib
+import json
+from tiered_cache import TieredCache
+
+
+def normalize_job_description(text):
+    return " ".join(str(text).split())
+
+
+# Fingerprint of everything that determines a Gemini ATS analysis
+def analysis_key(page_data, job_description, role, prompt_template, model_name):
+    if isinstance(page_data, str):
+        page_data = page_data.encode("utf-8")
+    payload = json.dumps(
+        [model_name, prompt_template, role, normalize_job_description(job_description), hashlib.sha256(page_data).hexdigest()],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Two-tier cache for ATS analysis responses (see TieredCache)
+class AnalysisCache(TieredCache):
+    def __init__(self, max_entries=256, ttl_seconds=7 * 24 * 3600, db_path=None):
+        super().__init__(max_entries, ttl_seconds, db_path, table="ats_responses", value_column="response")
+
+    # Return the cached response, or call generate() and remember what it returns
+    def get_or_generate(self, key, generate):
+        response = self.get(key)
+        if response is None:
+            response = generate()
+            self.set(key, response)
+        return response
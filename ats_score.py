@@ -0,0 +1,122 @@
+import numpy as np
+from job_search import TOKEN_PATTERN
+
+# Longest skill phrase (in words) looked for in free text; longer "skills" in the
+# dataset are sentences, not keywords
+MAX_PHRASE_WORDS = 4
+STOP_PHRASES = {"and", "or", "the", "of", "in", "to", "for", "with", "a", "an", "other", "others", "etc"}
+# Everyday words the skills column also lists; on their own they say nothing about
+# a candidate. They still count inside longer phrases ("data management").
+GENERIC_WORDS = {"it", "data", "skills", "management", "training", "tools", "technology", "information", "technical"}
+# Job titles are not skills: a phrase that ends in a role ("data scientist", "python
+# developer") or consists only of seniority and role words ("senior", "lead analyst")
+# is left out of the vocabulary, so a title is never a missing keyword. Skills named
+# inside a title ("python" in "python developer") are still found by extract().
+ROLE_WORDS = {
+    "scientist", "engineer", "analyst", "developer", "consultant", "manager", "architect", "specialist", "director",
+    "executive", "intern", "internship", "fresher", "trainee", "lead",
+}
+SENIORITY_WORDS = {"senior", "sr", "junior", "jr", "lead", "principal", "chief", "head", "associate", "staff"}
+
+
+def is_title(phrase):
+    words = phrase.split()
+    return words[-1] in ROLE_WORDS or all(word in ROLE_WORDS or word in SENIORITY_WORDS for word in words)
+
+
+def tokenize(text):
+    return [token.rstrip(".") for token in TOKEN_PATTERN.findall(str(text).lower()) if token.rstrip(".")]
+
+
+def normalize_phrase(text):
+    return " ".join(tokenize(text))
+
+
+# Keyword matcher and scorer over the skill vocabulary of a JobIndex. Works fully
+# offline: text is reduced to the set of skill terms it mentions, weighted by how
+# rare each term is across the postings (inverse document frequency).
+class KeywordScorer:
+    def __init__(self, job_index):
+        vocabulary = job_index.categories["skills"]
+
+        # Map every skill string to a normalized term; "ai/ml" and "ai / ml" become one
+        self.terms = []
+        self.term_ids = {}
+        code_terms = np.full(len(vocabulary), -1, dtype=np.int64)
+        for code, skill in enumerate(vocabulary):
+            phrase = normalize_phrase(skill)
+            if (not phrase or phrase in STOP_PHRASES or phrase in GENERIC_WORDS or is_title(phrase)
+                    or len(phrase.split()) > MAX_PHRASE_WORDS):
+                continue
+            if phrase not in self.term_ids:
+                self.term_ids[phrase] = len(self.terms)
+                self.terms.append(phrase)
+            code_terms[code] = self.term_ids[phrase]
+        self.terms = np.array(self.terms, dtype=object)
+
+        # Postings x terms in CSR form (posting_ptr, posting_terms), one entry per
+        # distinct term in a posting
+        offsets = np.asarray(job_index.offsets["skills"])
+        rows = np.repeat(np.arange(len(job_index)), np.diff(offsets))
+        terms = code_terms[np.asarray(job_index.codes["skills"])]
+        keep = terms >= 0
+        pairs = np.unique(rows[keep] * len(self.terms) + terms[keep])
+        self.posting_rows = pairs // len(self.terms)
+        self.posting_terms = pairs % len(self.terms)
+        self.row_count = len(job_index)
+
+        document_frequency = np.bincount(self.posting_terms, minlength=len(self.terms))
+        self.idf = np.log((1 + self.row_count) / (1 + document_frequency)) + 1
+        self.posting_weight = np.bincount(self.posting_rows, weights=self.idf[self.posting_terms], minlength=self.row_count)
+
+    # Ids of the vocabulary terms mentioned in text (phrases of up to MAX_PHRASE_WORDS
+    # words). Matches are longest-first and do not overlap, so "senior data scientist"
+    # is one keyword rather than also "data scientist" and "scientist".
+    def extract(self, text):
+        tokens = tokenize(text)
+        found = set()
+        start = 0
+        while start < len(tokens):
+            for size in range(min(MAX_PHRASE_WORDS, len(tokens) - start), 0, -1):
+                term = self.term_ids.get(" ".join(tokens[start:start + size]))
+                if term is not None:
+                    found.add(term)
+                    start += size
+                    break
+            else:
+                start += 1
+        return np.array(sorted(found), dtype=np.int64)
+
+    def _presence(self, terms):
+        present = np.zeros(len(self.terms), dtype=bool)
+        present[terms] = True
+        return present
+
+    # Share of the job description's keywords (IDF-weighted) found in the resume,
+    # plus the matched and missing keywords, rarest first
+    def score(self, resume_text, job_description):
+        resume_terms = self.extract(resume_text)
+        wanted = self.extract(job_description)
+        if not len(wanted):
+            return {"score": None, "matched": [], "missing": [], "resume_keywords": list(self.terms[resume_terms])}
+        found = self._presence(resume_terms)[wanted]
+        weights = self.idf[wanted]
+        order = np.argsort(-weights, kind="stable")
+        wanted, found = wanted[order], found[order]
+        return {
+            "score": round(100 * float(weights[order][found].sum() / weights.sum()), 1),
+            "matched": list(self.terms[wanted[found]]),
+            "missing": list(self.terms[wanted[~found]]),
+            "resume_keywords": list(self.terms[resume_terms]),
+        }
+
+    # The same score against every posting at once: one weighted bincount over the
+    # posting x term entries
+    def score_postings(self, resume_text):
+        found = self._presence(self.extract(resume_text))
+        matched = np.bincount(
+            self.posting_rows, weights=self.idf[self.posting_terms] * found[self.posting_terms], minlength=self.row_count
+        )
+        scores = np.zeros(self.row_count)
+        np.divide(100 * matched, self.posting_weight, out=scores, where=self.posting_weight > 0)
+        return scores
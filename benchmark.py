@@ -0,0 +1,283 @@
+import argparse
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from job_index import CSV_PATH, build_index, load_index
+from job_search import SearchIndex
+from skill_taxonomy import load_taxonomy, skill_buckets
+
+CAREER_DATA_PATH = "career_data.csv"
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentiles(seconds):
+    ms = np.array(seconds) * 1000
+    if not len(ms):
+        return {}
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in (50, 95, 99)}
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+# A tiny randomly initialized GPT-2 with a byte-level BPE tokenizer trained on the
+# career prompts, saved as a local snapshot. It produces nonsense, but exercises the
+# same loading, batching and decoding paths as the real model without any download.
+def build_standin_model(directory, corpus):
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    bpe = Tokenizer(models.BPE())
+    bpe.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    bpe.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(vocab_size=1024, special_tokens=["<|endoftext|>"],
+                                  initial_alphabet=pre_tokenizers.ByteLevel.alphabet())
+    bpe.train_from_iterator(corpus, trainer)
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=bpe, eos_token="<|endoftext|>", bos_token="<|endoftext|>",
+                                        unk_token="<|endoftext|>")
+
+    torch.manual_seed(0)
+    eos = tokenizer.convert_tokens_to_ids("<|endoftext|>")
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=1024, n_embd=64, n_layer=2, n_head=2,
+                        bos_token_id=eos, eos_token_id=eos)
+    GPT2LMHeadModel(config).save_pretrained(directory, safe_serialization=True)
+    tokenizer.save_pretrained(directory)
+    return directory
+
+
+# `count` requests built from career_data.csv, each with a distinct goal so that none
+# of them is answered from the roadmap cache
+def roadmap_requests(count, tag=""):
+    from precompute_roadmaps import read_career_data
+    requests = read_career_data(CAREER_DATA_PATH) or [
+        {"career_goal": "Data Scientist", "skills": ["Python", "SQL"], "learning_preference": "Online courses"}
+    ]
+    return [
+        dict(requests[i % len(requests)], career_goal=f"{requests[i % len(requests)]['career_goal']} #{tag}{i}")
+        for i in range(count)
+    ]
+
+
+# Drive /generate-roadmap with `concurrency` clients, either in-process through the
+# Flask test client or against a running server at url. Throughput counts generated
+# tokens only; against a server it needs the model's tokenizer (model), otherwise
+# generated words are reported instead.
+def run_backend(concurrency, total_requests, url=None, preset=None, max_new_tokens=None, model=None):
+    from roadmap_generation import build_prompt
+    if url is None:
+        import app as backend
+        if not backend.model_ready.wait(timeout=600):
+            raise RuntimeError(backend.model_error or "The model did not load in time.")
+        tokenizer = backend.tokenizer
+    else:
+        import requests as http
+        tokenizer = None
+        if model is not None:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(model)
+
+    payloads = roadmap_requests(total_requests, tag=f"{concurrency}-")
+    for payload in payloads:
+        if preset:
+            payload["preset"] = preset
+        if max_new_tokens:
+            payload["max_new_tokens"] = max_new_tokens
+    latencies, tokens, words, errors = [], [], [], []
+    lock = threading.Lock()
+    pending = iter(payloads)
+
+    def client():
+        test_client = backend.app.test_client() if url is None else None
+        while True:
+            with lock:
+                payload = next(pending, None)
+            if payload is None:
+                return
+            started = time.perf_counter()
+            if url is None:
+                response = test_client.post("/generate-roadmap", json=payload)
+                status, body = response.status_code, response.get_json()
+            else:
+                response = http.post(f"{url}/generate-roadmap", json=payload, timeout=600)
+                status, body = response.status_code, response.json()
+            elapsed = time.perf_counter() - started
+            with lock:
+                if status != 200:
+                    errors.append(status)
+                    continue
+                latencies.append(elapsed)
+                # The roadmap echoes the prompt, which is not generated work
+                prompt = build_prompt(payload["career_goal"], payload["skills"], payload["learning_preference"])
+                roadmap = body["roadmap"]
+                if tokenizer is not None:
+                    tokens.append(max(0, len(tokenizer(roadmap).input_ids) - len(tokenizer(prompt).input_ids)))
+                else:
+                    continuation = roadmap[len(prompt):] if roadmap.startswith(prompt) else roadmap
+                    words.append(len(continuation.split()))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    result = {"benchmark": "backend", "concurrency": concurrency, "requests": total_requests,
+              "errors": len(errors), "wall_seconds": round(wall, 3),
+              "requests_per_second": round(len(latencies) / wall, 3) if wall else None}
+    result.update(percentiles(latencies))
+    if tokens:
+        result["tokens_per_second"] = round(sum(tokens) / wall, 1)
+    if words:
+        result["generated_words_per_second"] = round(sum(words) / wall, 1)
+    if url is None:
+        result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        result["worker"] = backend.worker.stats()
+    return result
+
+
+# The bundled postings repeated `scale` times; copies get their own company names so
+# the category vocabularies grow with the data
+def synthetic_jobs(scale, csv_path=CSV_PATH):
+    base = pd.read_csv(csv_path, index_col=0)
+    copies = []
+    for copy in range(scale):
+        frame = base.copy()
+        if copy:
+            frame["companies"] = frame["companies"].astype(str) + f" {copy}"
+        copies.append(frame)
+    return pd.concat(copies, ignore_index=True)
+
+
+# A few pages of text rendered into a PDF with Pillow
+def synthetic_resume_pdf(pages=3):
+    from PIL import Image, ImageDraw
+    images = []
+    for page in range(pages):
+        image = Image.new("RGB", (1275, 1650), "white")
+        draw = ImageDraw.Draw(image)
+        for line in range(60):
+            draw.text((80, 80 + line * 24), f"Page {page + 1} line {line}: Python, SQL, machine learning, statistics",
+                      fill="black")
+        images.append(image)
+    buffer = io.BytesIO()
+    images[0].save(buffer, format="PDF", save_all=True, append_images=images[1:])
+    return buffer.getvalue()
+
+
+# Index build (what load_data() used to do), warm load, skill buckets, search and the
+# job listing render loop over a synthetic dataset scaled `scale` times
+def run_frontend(scale, page_size=25, pages=20):
+    result = {"benchmark": "frontend", "scale": scale}
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "jobs.csv")
+        synthetic_jobs(scale).to_csv(csv_path)
+
+        job_index, seconds = timed(build_index, csv_path, os.path.join(directory, "index"), log_path=None)
+        result["rows"] = len(job_index)
+        result["index_build_ms"] = round(seconds * 1000, 3)
+        job_index, seconds = timed(load_index, os.path.join(directory, "index"))
+        result["index_load_ms"] = round(seconds * 1000, 3)
+
+        _, seconds = timed(skill_buckets, job_index, load_taxonomy())
+        result["skill_buckets_ms"] = round(seconds * 1000, 3)
+
+        search_index, seconds = timed(SearchIndex, job_index)
+        result["search_index_ms"] = round(seconds * 1000, 3)
+        _, seconds = timed(search_index.query, {"companies": [0]}, "data sci", 3)
+        result["search_query_ms"] = round(seconds * 1000, 3)
+
+        listings, seconds = timed(job_index.listing_frame)
+        result["listing_frame_ms"] = round(seconds * 1000, 3)
+        # The card loop of the Job Listings section, minus the Streamlit calls
+        render_seconds = []
+        positions = job_index.sort_positions(np.arange(len(job_index)), "companies")
+        for page in range(min(pages, -(-len(positions) // page_size))):
+            started = time.perf_counter()
+            page_df = listings.iloc[positions[page * page_size:(page + 1) * page_size]]
+            [
+                (row.Title, f"**Company:** {row.Company}", f"**Experience Required:** {row.Experience}",
+                 f"**Location(s):** {row.Locations}", f"**Skills Required:** {row.Skills}")
+                for row in page_df.itertuples()
+            ]
+            render_seconds.append(time.perf_counter() - started)
+        result.update({f"listing_page_{name}": value for name, value in percentiles(render_seconds).items()})
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return result
+
+
+def run_pdf(pages=3, runs=5):
+    try:
+        from resume_document import ResumeRenderer
+        pdf_bytes = synthetic_resume_pdf(pages)
+        first, all_pages = [], []
+        for _ in range(runs):
+            # A fresh renderer each run, so the content-hash memo does not hide the cost
+            first.append(timed(ResumeRenderer().render, pdf_bytes)[1])
+            all_pages.append(timed(ResumeRenderer().render, pdf_bytes, all_pages=True)[1])
+        renderer = ResumeRenderer()
+        renderer.render(pdf_bytes)
+        memoized = timed(renderer.render, pdf_bytes)[1]
+    except Exception as e:
+        return {"benchmark": "pdf", "skipped": str(e)}
+    result = {"benchmark": "pdf", "pages": pages, "memoized_ms": round(memoized * 1000, 3)}
+    result.update({f"first_page_{name}": value for name, value in percentiles(first).items()})
+    result.update({f"all_pages_{name}": value for name, value in percentiles(all_pages).items()})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the roadmap API and the Streamlit data paths.")
+    parser.add_argument("suite", choices=["backend", "frontend", "pdf", "all"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    parser.add_argument("--model", help="model snapshot for the in-process backend (default: a tiny stand-in); "
+                                        "with --url, the tokenizer used to count generated tokens")
+    parser.add_argument("--url", help="benchmark a running server instead, e.g. http://127.0.0.1:5000")
+    parser.add_argument("--preset", help="decoding preset to request")
+    parser.add_argument("--max-new-tokens", type=int)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--pdf-pages", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.suite in ("frontend", "all"):
+        for scale in args.scales:
+            print(json.dumps(run_frontend(scale)))
+    if args.suite in ("pdf", "all"):
+        print(json.dumps(run_pdf(args.pdf_pages)))
+    if args.suite in ("backend", "all"):
+        with tempfile.TemporaryDirectory() as directory:
+            if args.url is None:
+                model = args.model
+                if model is None:
+                    from roadmap_generation import build_prompt
+                    corpus = [build_prompt(r["career_goal"], r["skills"], r["learning_preference"])
+                              for r in roadmap_requests(200)]
+                    print("Building a stand-in model...", file=sys.stderr)
+                    model = build_standin_model(directory, corpus)
+                # app.py reads its configuration at import time
+                os.environ["ROADMAP_MODEL_PATH"] = model
+                os.environ.setdefault("ROADMAP_METRICS", "1")
+            for concurrency in args.concurrency:
+                print(json.dumps(run_backend(concurrency, args.requests, args.url, args.preset, args.max_new_tokens,
+                                             args.model if args.url else None)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import difflib
+import json
+import multiprocessing
+import os
+import resource
+import time
+import torch
+from model_loader import load_model
+from roadmap_generation import DECODING_PRESETS, DEFAULT_PRESET, build_prompt, generate_roadmaps, generate_tokens
+
+PROFILES = ("fp32", "bf16", "int8")
+
+# Inputs used to compare profiles, matching the learning styles offered in job.py
+BENCHMARK_REQUESTS = [
+    ("Data Scientist", ["Python", "SQL", "Statistics"], "Self-paced online courses"),
+    ("Machine Learning Engineer", ["Python", "Deep Learning"], "Project-based learning"),
+    ("Data Analyst", ["Excel", "Tableau"], "Video lectures"),
+    ("Full Stack Developer", ["JavaScript", "Git"], "Structured bootcamp"),
+]
+
+
+def bf16_supported():
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def configure_threads(num_threads=None, interop_threads=None):
+    if num_threads:
+        torch.set_num_threads(int(num_threads))
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(int(interop_threads))
+        except RuntimeError as e:
+            # Interop threads can only be set before torch starts any parallel work
+            print(f"Could not set interop threads: {e}")
+
+
+# Convert a loaded fp32 model to the requested CPU inference profile
+def apply_profile(model, profile):
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown inference profile '{profile}', expected one of {', '.join(PROFILES)}")
+    if profile == "bf16":
+        if bf16_supported():
+            return model.to(torch.bfloat16).eval()
+        print("bf16 is not supported on this CPU, using fp32.")
+    elif profile == "int8":
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8).eval()
+    return model.eval()
+
+
+def warm_up(tokenizer, model):
+    generate_tokens(tokenizer, model, ["Roadmap:"], max_new_tokens=1)
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # ru_maxrss is the peak, reported in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_profile(model_name, profile, runs, num_threads, interop_threads, preset=DEFAULT_PRESET):
+    configure_threads(num_threads, interop_threads)
+    tokenizer, model = load_model(model_name)
+    model = apply_profile(model, profile)
+    warm_up(tokenizer, model)
+
+    prompts = [build_prompt(*request) for request in BENCHMARK_REQUESTS]
+    latencies = []
+    new_tokens = 0
+    for _ in range(runs):
+        for prompt in prompts:
+            start = time.perf_counter()
+            inputs, outputs = generate_tokens(tokenizer, model, [prompt], **DECODING_PRESETS[preset])
+            latencies.append(time.perf_counter() - start)
+            new_tokens += outputs.shape[1] - inputs.input_ids.shape[1]
+
+    return {
+        "profile": profile,
+        "preset": preset,
+        "mean_latency_s": sum(latencies) / len(latencies),
+        "max_latency_s": max(latencies),
+        "tokens_per_s": new_tokens / sum(latencies),
+        "rss_mb": current_rss_mb(),
+        "outputs": generate_roadmaps(tokenizer, model, prompts, preset)[0],
+    }
+
+
+# Outputs should stay close to the fp32 baseline and must not collapse into repetition
+def quality_check(outputs, baseline, min_similarity=0.6, min_distinct_ratio=0.3):
+    checks = []
+    for output, reference in zip(outputs, baseline):
+        # Compare only the generated text; the shared prompt would inflate the similarity
+        continuation = output.split("Roadmap:", 1)[-1].split()
+        reference_continuation = reference.split("Roadmap:", 1)[-1].split()
+        similarity = difflib.SequenceMatcher(None, continuation, reference_continuation).ratio()
+        distinct_ratio = len(set(continuation)) / len(continuation) if continuation else 0.0
+        checks.append(bool(continuation) and similarity >= min_similarity and distinct_ratio >= min_distinct_ratio)
+    return all(checks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU inference profiles for the roadmap model.")
+    parser.add_argument("--model", default=os.getenv("ROADMAP_MODEL_PATH") or "asthaaa300/results")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--preset", choices=sorted(DECODING_PRESETS), default=DEFAULT_PRESET)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--interop-threads", type=int, default=None)
+    args = parser.parse_args()
+
+    # Each profile runs in a fresh process so RSS numbers are not mixed up
+    profiles = ["fp32"] + [profile for profile in args.profiles if profile != "fp32"]
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for profile in profiles:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(run_profile, (args.model, profile, args.runs, args.threads, args.interop_threads, args.preset)))
+
+    baseline = results[0]["outputs"]
+    for result in results:
+        if result["profile"] not in args.profiles:
+            continue
+        result["quality_pass"] = quality_check(result.pop("outputs"), baseline)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+
+
+class WorkerBusy(Exception):
+    pass
+
+
+# A prompt waiting for the worker. cancel() drops it from the queue, or asks a running
+# generation to stop once every request in its batch has been cancelled.
+class InferenceRequest:
+    def __init__(self, prompt, key):
+        self.prompt = prompt
+        self.key = key
+        self.future = Future()
+        self.cancelled = threading.Event()
+        self.enqueued = time.monotonic()
+
+    def cancel(self):
+        self.cancelled.set()
+        self.future.cancel()
+
+    def result(self, timeout=None):
+        try:
+            return self.future.result(timeout=timeout)
+        except TimeoutError:
+            self.cancel()
+            raise
+
+
+# The only thread that touches the model. Requests wait in a bounded queue and are
+# collected into batches: a batch is dispatched as soon as it holds max_batch_size
+# prompts or max_wait_ms has passed since its first prompt arrived, whichever comes
+# first. Prompts submitted with different keys (e.g. decoding settings) are never
+# mixed; the key is handed to generate_batch along with the prompts and a should_stop
+# callback that turns true once the whole batch has been cancelled.
+class InferenceWorker:
+    def __init__(self, generate_batch, max_batch_size=8, max_wait_ms=5.0, max_queue_size=64):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        # A slot is held from submit until the request leaves for a batch, so requests
+        # set aside in _pending still count against the limit
+        self.max_queue_size = max(1, int(max_queue_size))
+        self._slots = threading.BoundedSemaphore(self.max_queue_size)
+        self._queue = queue.Queue()
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "cancelled": 0,
+            "completed": 0,
+            "failed": 0,
+            "batches": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "service_seconds_total": 0.0,
+            "service_seconds_max": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="inference-worker", daemon=True)
+        self._thread.start()
+
+    # Raises WorkerBusy when the queue is full, unless block is set
+    def submit(self, prompt, key=None, block=False):
+        if not self._slots.acquire(blocking=block):
+            self._count("rejected")
+            raise WorkerBusy("The inference queue is full.")
+        request = InferenceRequest(prompt, key)
+        self._queue.put(request)
+        self._count("submitted")
+        return request
+
+    def generate(self, prompt, key=None, timeout=None):
+        return self.submit(prompt, key).result(timeout=timeout)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _observe(self, name, seconds):
+        with self._lock:
+            self._stats[f"{name}_seconds_total"] += seconds
+            self._stats[f"{name}_seconds_max"] = max(self._stats[f"{name}_seconds_max"], seconds)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize() + len(self._pending)
+        stats["queue_capacity"] = self.max_queue_size
+        started = stats["completed"] + stats["failed"]
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / started if started else 0.0
+        stats["service_seconds_avg"] = stats["service_seconds_total"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def _collect(self):
+        first = self._pending.popleft() if self._pending else self._queue.get()
+        batch = [first]
+
+        # Requests set aside by an earlier round go first
+        for request in list(self._pending):
+            if len(batch) >= self.max_batch_size:
+                break
+            if request.key == first.key:
+                self._pending.remove(request)
+                batch.append(request)
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request.key == first.key:
+                batch.append(request)
+            else:
+                self._pending.append(request)
+        return first.key, batch
+
+    def _run(self):
+        while True:
+            key, batch = self._collect()
+            for _ in batch:
+                self._slots.release()
+
+            # Skip requests whose caller already gave up
+            running = []
+            for request in batch:
+                if request.future.set_running_or_notify_cancel():
+                    running.append(request)
+                else:
+                    self._count("cancelled")
+            if not running:
+                continue
+
+            started = time.monotonic()
+            for request in running:
+                self._observe("wait", started - request.enqueued)
+            try:
+                results = self.generate_batch(
+                    [request.prompt for request in running],
+                    key,
+                    lambda: all(request.cancelled.is_set() for request in running),
+                )
+            except Exception as e:
+                self._count("failed", len(running))
+                for request in running:
+                    request.future.set_exception(e)
+                continue
+            finally:
+                self._count("batches")
+                self._observe("service", time.monotonic() - started)
+
+            self._count("completed", len(running))
+            for request, result in zip(running, results):
+                request.future.set_result(result)
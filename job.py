@@ -1,32 +1,69 @@
-import base64
 import json
+import numpy as np
 import pandas as pd
 import streamlit as st
 import os
-import io
 from PIL import Image
-import pdf2image
 import google.generativeai as genai
 from dotenv import load_dotenv
-import plotly.express as px
 from streamlit_option_menu import option_menu
 from streamlit_lottie import st_lottie
 import streamlit.components.v1 as components
 import requests
+from job_index import index_version, load_or_build_index
+from job_search import SearchIndex
+from skill_taxonomy import load_taxonomy
+from job_analytics import build_dashboard
+from stage_metrics import StageMetrics
+from ats_cache import AnalysisCache, analysis_key
+from resume_document import ResumeRenderer
+from ats_score import KeywordScorer
+from job_vectors import load_or_build_vectors
 
 # Load API key from environment variable
 load_dotenv()
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+# Opt-in per-stage timers (JOB_METRICS=1), shared by all sessions and shown in the sidebar
+@st.cache_resource
+def load_stage_metrics():
+    return StageMetrics(enabled=os.getenv("JOB_METRICS", "0") == "1", prefix="job")
+
+stage_metrics = load_stage_metrics()
+
 #Load and preprocess data
-@st.cache_data
-def load_data():
-    df = pd.read_csv("DataScience_jobs.csv", index_col=0)
-    df = df.dropna()
-    df = df.apply(lambda x: x.astype(str).str.lower())
-    df['skills'] = df['skills'].str.split('\n')
-    df['locations'] = df['locations'].str.split(',')
-    return df
+# The CSV is normalized once into a memory-mapped columnar index (see job_index.py),
+# shared by every session instead of being copied into each one. Everything derived
+# from it is keyed on the index version, so postings ingested while the app runs
+# show up on the next rerun.
+def dataset_version():
+    return index_version("job_index", "DataScience_jobs.csv")
+
+@st.cache_resource(max_entries=1)
+def load_job_index(version):
+    return load_or_build_index("DataScience_jobs.csv")
+
+@st.cache_resource(max_entries=1)
+def load_search_index(version):
+    return SearchIndex(load_job_index(version))
+
+@st.cache_resource(max_entries=1)
+def load_job_listings(version):
+    return load_job_index(version).listing_frame()
+
+# Sort choices for the job listings, mapped to index columns
+LISTING_SORT_OPTIONS = {
+    "Posting order": None,
+    "Role (A-Z)": "roles",
+    "Company (A-Z)": "companies",
+    "Experience (low to high)": "experience",
+}
+
+# Metrics and charts of the Job Market tab, built once per dataset version (see
+# job_analytics.py); reruns only hand the prepared figures to Streamlit
+@st.cache_resource(max_entries=1)
+def load_dashboard(version):
+    return build_dashboard(load_job_index(version), load_taxonomy("skill_taxonomy.json"))
 input_prompt1 = """
 You are an experienced Human Resource Manager, your task is to review the provided resume against the job description for a {role}.
 Please share your professional evaluation on whether the candidate's profile aligns with the role. 
@@ -39,28 +76,95 @@ evaluate the resume against the provided job description for a {role}. Give the
 the job description. First the output should come as a percentage, then keywords missing and last final thoughts.
 """
 
-def get_gemini_response(input_text, pdf_content, prompt):
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    response = model.generate_content([input_text, pdf_content[0], prompt])
-    return response.text
+GEMINI_MODEL = "gemini-1.5-flash"
+
+# One Gemini client for the whole process instead of one per click
+@st.cache_resource
+def load_gemini_model():
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+# Analyses are keyed on the resume image, the job description, the role, the prompt
+# and the model, so re-running the same analysis never goes back to the API
+@st.cache_resource
+def load_ats_cache():
+    return AnalysisCache(
+        ttl_seconds=float(os.getenv("ATS_CACHE_TTL", 7 * 24 * 3600)),
+        db_path=os.getenv("ATS_CACHE_DB", "ats_cache.sqlite3") or None,
+    )
+
+def get_gemini_response(input_text, pdf_content, prompt_template, role):
+    prompt = prompt_template.format(role=role)
+    key = analysis_key("".join(part["data"] for part in pdf_content), input_text, role, prompt_template, GEMINI_MODEL)
+
+    def generate():
+        response = load_gemini_model().generate_content([input_text, *pdf_content, prompt])
+        return response.text
+
+    return load_ats_cache().get_or_generate(key, generate)
 
-def input_pdf_setup(uploaded_file):
+# Rasterized resumes are memoized by content hash (see resume_document.py), so the
+# analysis and the preview share one rendering per upload
+@st.cache_resource
+def load_resume_renderer():
+    return ResumeRenderer()
+
+def load_resume(uploaded_file, all_pages=False):
+    # getvalue() returns the whole upload even after the stream has been read
+    return load_resume_renderer().render(uploaded_file.getvalue(), all_pages=all_pages)
+
+# Offline keyword scoring against the skill vocabulary of the postings (see ats_score.py)
+@st.cache_resource(max_entries=1)
+def load_keyword_scorer(version):
+    return KeywordScorer(load_job_index(version))
+
+# Posting embeddings for semantic resume-to-job matching (see job_vectors.py); postings
+# added to the job index since the vectors were built are embedded on load
+@st.cache_resource(max_entries=1)
+def load_job_vectors(version):
+    return load_or_build_vectors(load_job_index(version))
+
+def read_resume_text(uploaded_file):
+    try:
+        resume_text = load_resume_renderer().text(uploaded_file.getvalue())
+    except Exception as e:
+        st.error(f"Error reading PDF text: {e}")
+        return None
+    if not resume_text.strip():
+        st.warning("No text layer found in this PDF; keyword and job matching need a text-based resume.")
+        return None
+    return resume_text
+
+def show_keyword_score(resume_text, job_description):
+    scorer = load_keyword_scorer(dataset_version())
+    result = scorer.score(resume_text, job_description)
+    st.subheader("Keyword Match")
+    if result["score"] is None:
+        st.info("No known skill keywords found in the job description.")
+    else:
+        st.metric("Match", f"{result['score']}%")
+        st.write("**Matched keywords:** " + (", ".join(result["matched"]) or "none"))
+        st.write("**Missing keywords:** " + (", ".join(result["missing"]) or "none"))
+
+# Postings closest to the resume, with their keyword coverage alongside
+def show_similar_jobs(resume_text, k=10):
+    version = dataset_version()
+    matches = load_job_vectors(version).match(resume_text, k)
+    listings = load_job_listings(version)
+    matches = [(row_id, similarity) for row_id, similarity in matches if row_id in listings.index]
+    if not matches:
+        return
+    keyword_scores = pd.Series(load_keyword_scorer(version).score_postings(resume_text), index=listings.index)
+    row_ids = [row_id for row_id, _ in matches]
+    similar = listings.loc[row_ids, ["Role", "Company", "Experience", "Locations"]]
+    similar.insert(0, "Similarity", [round(similarity, 3) for _, similarity in matches])
+    similar["Keyword match %"] = keyword_scores.loc[row_ids].round(0).to_numpy()
+    st.subheader("Best Matching Jobs")
+    st.dataframe(similar, use_container_width=True, hide_index=True)
+
+def input_pdf_setup(uploaded_file, all_pages=False):
     if uploaded_file is not None:
         try:
-            images = pdf2image.convert_from_bytes(uploaded_file.read())
-            first_page = images[0]
-
-            img_byte_arr = io.BytesIO()
-            first_page.save(img_byte_arr, format='JPEG')
-            img_byte_arr = img_byte_arr.getvalue()
-
-            pdf_parts = [
-                {
-                    "mime_type": "image/jpeg",
-                    "data": base64.b64encode(img_byte_arr).decode()
-                }
-            ]
-            return pdf_parts
+            return load_resume(uploaded_file, all_pages).gemini_parts()
         except Exception as e:
             st.error(f"Error processing PDF: {e}")
         return None
@@ -165,21 +269,38 @@ with tab2:
 
     analysis_choice = st.selectbox("Select Analysis Type",
                                    ["HR Manager Perspective", "ATS Scanner Perspective"])
+    all_pages = st.checkbox("Analyze every page (multi-page resume)", value=False)
+    # The ATS perspective is scored locally; Gemini is an optional deeper pass
+    deep_analysis = analysis_choice == "HR Manager Perspective" or st.checkbox(
+        "Add the Gemini ATS analysis", value=False
+    )
 
     submit_button = st.button("Analyze")
 
     if submit_button:
+        if analysis_choice == "ATS Scanner Perspective" and uploaded_file is not None:
+            resume_text = read_resume_text(uploaded_file)
+            if resume_text:
+                with stage_metrics.time("keyword_score"):
+                    show_keyword_score(resume_text, input_text)
+                with stage_metrics.time("job_match"):
+                    show_similar_jobs(resume_text)
+        elif not deep_analysis:
+            st.error("No file uploaded")
         with st.spinner("Processing..."):
-            pdf_content = input_pdf_setup(uploaded_file)
+            pdf_content = input_pdf_setup(uploaded_file, all_pages) if deep_analysis else None
             if pdf_content:
                 role = selected_role
                 if analysis_choice == "HR Manager Perspective":
-                    prompt = input_prompt1.format(role=role)
+                    prompt_template = input_prompt1
                 else:
-                    prompt = input_prompt2.format(role=role)
-                response = get_gemini_response(input_text, pdf_content, prompt)
+                    prompt_template = input_prompt2
+                response = get_gemini_response(input_text, pdf_content, prompt_template, role)
                 st.subheader("Analysis Result")
                 st.write(response)
+                cache_stats = load_ats_cache().stats()
+                st.caption(f"Analysis cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+                           f"{cache_stats['misses']} misses")
 
     # Layout for displaying job description and resume side by side
     if uploaded_file and input_text:
@@ -193,8 +314,10 @@ with tab2:
         with col2:
             st.markdown("### Resume Preview")
             try:
-                images = pdf2image.convert_from_bytes(uploaded_file.read())
-                st.image(images[0], use_column_width=True)
+                resume = load_resume(uploaded_file, all_pages)
+                st.image(resume.preview(), use_column_width=True)
+                if resume.page_count > 1:
+                    st.caption(f"Page 1 of {resume.page_count}")
             except Exception as e:
                 st.error(e)
 
@@ -241,18 +364,38 @@ with tab3:
                         "learning_preference": learning_preference
                     }
 
+                    # Stream the roadmap so the text renders while it is being generated
                     response = requests.post(
-                        "http://localhost:5000/generate-roadmap",
+                        "http://localhost:5000/generate-roadmap/stream",
                         json=data,
-                        headers={"Content-Type": "application/json"}
+                        headers={"Content-Type": "application/json", "Accept": "text/event-stream"},
+                        stream=True
                     )
 
                     if response.status_code == 200:
-                        roadmap = response.json()["roadmap"]
-                        st.success("🎉 Your roadmap has been generated!")
                         st.markdown("### Your Personalized Learning Roadmap")
-                        st.markdown(roadmap)
-                        
+                        roadmap_placeholder = st.empty()
+                        roadmap = ""
+                        stream_error = None
+                        event = None
+                        for line in response.iter_lines(decode_unicode=True):
+                            if line.startswith("event:"):
+                                event = line[len("event:"):].strip()
+                            elif line.startswith("data:"):
+                                payload = json.loads(line[len("data:"):])
+                                if event == "error":
+                                    stream_error = payload.get("error", "Unknown error occurred")
+                                elif "token" in payload:
+                                    roadmap += payload["token"]
+                                    roadmap_placeholder.markdown(roadmap)
+                            elif not line:
+                                event = None
+
+                        if stream_error:
+                            st.error(f"Error: {stream_error}")
+                        else:
+                            st.success("🎉 Your roadmap has been generated!")
+
                         st.download_button(
                             label="Download Roadmap",
                             data=roadmap,
@@ -279,158 +422,122 @@ with tab4:
     st.markdown("# 📊 Data Science Job Market Analysis")
     
     try:
-        df = load_data()
+        version = dataset_version()
+        with stage_metrics.time("dashboard"):
+            job_index = load_job_index(version)
+            dashboard = load_dashboard(version)
         
         # Job Overview section with metrics
         st.markdown("## 📈 Job Market Overview")
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Total Jobs", len(df))
+            st.metric("Total Jobs", dashboard["metrics"]["total_jobs"])
         with col2:
-            st.metric("Unique Companies", df['companies'].nunique())
+            st.metric("Unique Companies", dashboard["metrics"]["unique_companies"])
         with col3:
-            st.metric("Unique Locations", sum(len(locations) for locations in df['locations']))
+            st.metric("Unique Locations", dashboard["metrics"]["unique_locations"])
 
         # Create two columns for the first row of visualizations
         col1, col2 = st.columns(2)
 
         with col1:
             st.subheader("Location-wise Job Distribution")
-            location_data = df.locations.explode().str.strip().value_counts().head(10)
-            fig_location = px.pie(
-                values=location_data.values,
-                names=location_data.index,
-                title="Top 10 Cities for Data Science Jobs",
-                hole=0.4,
-            )
-            st.plotly_chart(fig_location, use_container_width=True)
+            st.plotly_chart(dashboard["locations"], use_container_width=True)
 
         with col2:
             st.subheader("Top Companies Hiring")
-            company_data = df['companies'].value_counts().head(10)
-            fig_companies = px.bar(
-                x=company_data.index,
-                y=company_data.values,
-                title="Top 10 Companies with Most Job Postings",
-                labels={'x': 'Company', 'y': 'Number of Job Postings'}
-            )
-            fig_companies.update_layout(xaxis_tickangle=45)
-            st.plotly_chart(fig_companies, use_container_width=True)
+            st.plotly_chart(dashboard["companies"], use_container_width=True)
+
+        st.subheader("Experience Distribution")
+        st.plotly_chart(dashboard["experience"], use_container_width=True)
         # Add Job Listings Section before Skills Analysis
         st.markdown("## 💼 Job Listings")
         
-        # Add filters
+        # Filters resolve against the inverted index. Widget state from the previous run
+        # is read first so that every option can show how many jobs it would leave.
+        search_index = load_search_index(version)
+        facet_labels = {
+            "companies": "Filter by Company",
+            "experience": "Filter by Experience",
+            "locations": "Filter by Location",
+            "skills": "Filter by Skill",
+        }
+        selected_filters = {column: st.session_state.get(f"filter_{column}", []) for column in facet_labels}
+        search_text = st.session_state.get("job_search", "")
+        experience_years = st.session_state.get("experience_years")
+        with stage_metrics.time("search_query"):
+            mask, facet_counts = search_index.query(selected_filters, search_text, experience_years)
+
         col1, col2 = st.columns(2)
         with col1:
-            companies_filter = st.multiselect(
-                "Filter by Company",
-                options=sorted(df['companies'].unique()),
-                default=[]
-            )
+            st.text_input("Search roles and skills", key="job_search",
+                          placeholder="E.g., python, deep lea, data sci")
         with col2:
-            experience_filter = st.multiselect(
-                "Filter by Experience",
-                options=sorted(df['experience'].unique()),
-                default=[]
-            )
-
-        # Filter the dataframe based on filters
-        filtered_df = df.copy()
-        if companies_filter:
-            filtered_df = filtered_df[filtered_df['companies'].isin(companies_filter)]
-        if experience_filter:
-            filtered_df = filtered_df[filtered_df['experience'].isin(experience_filter)]
+            st.number_input("I have N years of experience", min_value=0, max_value=50, value=None, step=1,
+                            key="experience_years", placeholder="Any")
+        col1, col2 = st.columns(2)
+        for facet_col, column in zip([col1, col2, col1, col2], facet_labels):
+            categories = job_index.categories[column]
+            counts = facet_counts[column]
+            # Experience ranges are listed numerically, everything else alphabetically
+            options = (job_index.experience_order() if column == "experience" else job_index.category_order(column)).tolist()
+            with facet_col:
+                st.multiselect(
+                    facet_labels[column],
+                    options=options,
+                    format_func=lambda code, categories=categories, counts=counts: f"{categories[code]} ({counts[code]})",
+                    key=f"filter_{column}"
+                )
+        positions = np.flatnonzero(mask)
+
+        # Only the current page is rendered, so the cost depends on the page size
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            listing_view = st.radio("View", ["Cards", "Table"], horizontal=True)
+        with col2:
+            sort_by = st.selectbox("Sort by", list(LISTING_SORT_OPTIONS))
+        with col3:
+            page_size = st.selectbox("Jobs per page", [10, 25, 50, 100], index=1)
+
+        positions = job_index.sort_positions(positions, LISTING_SORT_OPTIONS[sort_by])
+        page_count = max(1, -(-len(positions) // page_size))
+        # Keyed on the result shape so the page resets when filters or page size change
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1,
+                               key=f"job_page_{len(positions)}_{page_size}_{sort_by}")
+        page_positions = positions[(page - 1) * page_size:page * page_size]
+        page_df = load_job_listings(version).iloc[page_positions]
 
         # Display job listings
-        st.write(f"Showing {len(filtered_df)} jobs")
-        for idx, row in filtered_df.iterrows():
-            with st.expander(f"{row['roles']} at {row['companies']}"):
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown(f"**Company:** {row['companies'].title()}")
-                    st.markdown(f"**Experience Required:** {row['experience']}")
-                with col2:
-                    st.markdown(f"**Location(s):** {', '.join(loc.strip().title() for loc in row['locations'])}")
-                    st.markdown(f"**Skills Required:** {', '.join(skill.strip().title() for skill in row['skills'])}")
+        if len(positions):
+            st.write(f"Showing {(page - 1) * page_size + 1}-{(page - 1) * page_size + len(page_positions)} of {len(positions)} jobs (page {page} of {page_count})")
+        else:
+            st.write("Showing 0 jobs")
+        with stage_metrics.time("listing_render"):
+            if listing_view == "Table":
+                st.dataframe(page_df.drop(columns="Title"), use_container_width=True, hide_index=True)
+            else:
+                for row in page_df.itertuples():
+                    with st.expander(row.Title):
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.markdown(f"**Company:** {row.Company}")
+                            st.markdown(f"**Experience Required:** {row.Experience}")
+                        with col2:
+                            st.markdown(f"**Location(s):** {row.Locations}")
+                            st.markdown(f"**Skills Required:** {row.Skills}")
 
 
         # Skills Analysis Section
         st.markdown("## 🎯 Skills Analysis")
         
-        # Process skills data
-        skills_data = df.skills.explode().value_counts()
-
-        # Create tabs for different skill categories
-        tab1, tab2, tab3, tab4 = st.tabs(["Core Skills", "Programming Languages", "Frameworks & Tools", "Cloud & Big Data"])
-
-        with tab1:
-            core_skills = {
-                'Machine Learning': skills_data[skills_data.index.str.contains('machine|ml', case=False)].sum(),
-                'Data Mining': skills_data[skills_data.index.str.contains('mining', case=False)].sum(),
-                'Statistics': skills_data[skills_data.index.str.contains('stat', case=False)].sum(),
-                'NLP': skills_data[skills_data.index.str.contains('nlp|natural', case=False)].sum(),
-                'Deep Learning': skills_data[skills_data.index.str.contains('deep learning', case=False)].sum(),
-                'Computer Vision': skills_data[skills_data.index.str.contains('computer vision', case=False)].sum()
-            }
-            fig_core = px.bar(
-                x=list(core_skills.keys()),
-                y=list(core_skills.values()),
-                title="Core Data Science Skills in Demand",
-                color=list(core_skills.values()),
-                color_continuous_scale='Viridis'
-            )
-            st.plotly_chart(fig_core, use_container_width=True)
-
-        with tab2:
-            programming_langs = {
-                'Python': skills_data[skills_data.index.str.contains('python', case=False)].sum(),
-                'R': skills_data[skills_data.index.str.contains('^r$', case=False)].sum(),
-                'SQL': skills_data[skills_data.index.str.contains('sql', case=False)].sum(),
-                'Java': skills_data[skills_data.index.str.contains('java$', case=False)].sum(),
-                'C++': skills_data[skills_data.index.str.contains('c\+\+', case=False)].sum()
-            }
-            fig_lang = px.pie(
-                values=list(programming_langs.values()),
-                names=list(programming_langs.keys()),
-                title="Programming Languages Distribution",
-                hole=0.4
-            )
-            st.plotly_chart(fig_lang, use_container_width=True)
-
-        with tab3:
-            frameworks = {
-                'TensorFlow': skills_data[skills_data.index.str.contains('tensor', case=False)].sum(),
-                'PyTorch': skills_data[skills_data.index.str.contains('torch', case=False)].sum(),
-                'Keras': skills_data[skills_data.index.str.contains('keras', case=False)].sum(),
-                'Tableau': skills_data[skills_data.index.str.contains('tableau', case=False)].sum(),
-                'Power BI': skills_data[skills_data.index.str.contains('power bi', case=False)].sum()
-            }
-            fig_frameworks = px.bar(
-                x=list(frameworks.keys()),
-                y=list(frameworks.values()),
-                title="Frameworks and Tools Usage",
-                color=list(frameworks.values()),
-                color_continuous_scale='Viridis'
-            )
-            st.plotly_chart(fig_frameworks, use_container_width=True)
-
-        with tab4:
-            cloud_bigdata = {
-                'AWS': skills_data[skills_data.index.str.contains('aws', case=False)].sum(),
-                'Azure': skills_data[skills_data.index.str.contains('azure', case=False)].sum(),
-                'GCP': skills_data[skills_data.index.str.contains('gcp', case=False)].sum(),
-                'Spark': skills_data[skills_data.index.str.contains('spark', case=False)].sum(),
-                'Hadoop': skills_data[skills_data.index.str.contains('hadoop', case=False)].sum()
-            }
-            fig_cloud = px.bar(
-                x=list(cloud_bigdata.keys()),
-                y=list(cloud_bigdata.values()),
-                title="Cloud & Big Data Technologies",
-                color=list(cloud_bigdata.values()),
-                color_continuous_scale='Viridis'
-            )
-            st.plotly_chart(fig_cloud, use_container_width=True)
+        # Skill counts per taxonomy bucket (see skill_taxonomy.json), one tab per category
+        skill_figures = dashboard["skills"]
+        skill_tabs = st.tabs(list(skill_figures))
+
+        for skill_tab, fig_skills in zip(skill_tabs, skill_figures.values()):
+            with skill_tab:
+                st.plotly_chart(fig_skills, use_container_width=True)
 
     except Exception as e:
         st.error(f"Error loading or processing data: {str(e)}")
@@ -449,4 +556,8 @@ with tab5:
     st.markdown("Ans. Yes! It is absolutely free to use.")
     st.markdown("Q. How do I get started?")
     st.markdown("Ans. Simply upload your resume, enter a job description or career goal, and let CareerMind AI analyze and generate insights for you.")
-    st.markdown("""---""")
\ No newline at end of file
+    st.markdown("""---""")
+
+if stage_metrics.enabled:
+    with st.sidebar.expander("Stage timings"):
+        st.json(stage_metrics.snapshot())
@@ -0,0 +1,74 @@
+import numpy as np
+import plotly.express as px
+from skill_taxonomy import skill_buckets
+
+TOP_N = 10
+
+
+# Headline numbers for the Job Market Overview. Distinct values are categories that
+# at least one posting uses.
+def overview_metrics(job_index):
+    return {
+        "total_jobs": len(job_index),
+        "unique_companies": int(np.count_nonzero(job_index.counts("companies"))),
+        "unique_locations": int(np.count_nonzero(job_index.counts("locations"))),
+    }
+
+
+def location_figure(job_index, top=TOP_N):
+    location_data = job_index.value_counts("locations").head(top)
+    return px.pie(
+        values=location_data.values,
+        names=location_data.index,
+        title=f"Top {top} Cities for Data Science Jobs",
+        hole=0.4,
+    )
+
+
+def company_figure(job_index, top=TOP_N):
+    company_data = job_index.value_counts("companies").head(top)
+    fig = px.bar(
+        x=company_data.index,
+        y=company_data.values,
+        title=f"Top {top} Companies with Most Job Postings",
+        labels={"x": "Company", "y": "Number of Job Postings"},
+    )
+    fig.update_layout(xaxis_tickangle=45)
+    return fig
+
+
+def experience_figure(job_index):
+    experience_coverage = job_index.experience_coverage()
+    return px.bar(
+        x=np.arange(len(experience_coverage)),
+        y=experience_coverage,
+        title="Job Postings Open at Each Experience Level",
+        labels={"x": "Years of Experience", "y": "Number of Job Postings"},
+    )
+
+
+# One chart per taxonomy category, in taxonomy order
+def skill_figures(job_index, taxonomy):
+    figures = {}
+    for category, bucket in skill_buckets(job_index, taxonomy).items():
+        names = list(bucket["counts"].keys())
+        counts = list(bucket["counts"].values())
+        if bucket["chart"] == "pie":
+            figures[category] = px.pie(values=counts, names=names, title=bucket["title"], hole=0.4)
+        else:
+            figures[category] = px.bar(
+                x=names, y=counts, title=bucket["title"], color=counts, color_continuous_scale="Viridis"
+            )
+    return figures
+
+
+# Every aggregate and figure of the Job Market tab, built once per dataset version
+# and shared read-only by all sessions
+def build_dashboard(job_index, taxonomy):
+    return {
+        "metrics": overview_metrics(job_index),
+        "locations": location_figure(job_index),
+        "companies": company_figure(job_index),
+        "experience": experience_figure(job_index),
+        "skills": skill_figures(job_index, taxonomy),
+    }
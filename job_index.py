@@ -0,0 +1,423 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+CSV_PATH = "DataScience_jobs.csv"
+INDEX_DIR = "job_index"
+# Postings added with --ingest; replayed after the CSV whenever the index is rebuilt
+INGEST_LOG = "ingested_jobs.jsonl"
+FORMAT_VERSION = 3
+
+COLUMNS = ("roles", "companies", "locations", "experience", "skills")
+SCALAR_COLUMNS = ("roles", "companies", "experience")
+LIST_COLUMNS = ("skills", "locations")
+LIST_SEPARATORS = {"skills": "\n", "locations": ","}
+# Postings missing one of these are rejected; other missing fields are kept empty
+REQUIRED_COLUMNS = ("roles", "companies")
+
+# One flat binary file per array. Files only ever grow: meta.json records how many
+# rows, list entries and categories belong to the index, and is written last.
+ARRAY_DTYPES = {
+    "row_ids": np.int64,
+    "content_hash": np.uint64,
+    "experience_min": np.int16,
+    "experience_max": np.int16,
+    "roles": np.int32,
+    "companies": np.int32,
+    "experience": np.int32,
+    "skills_codes": np.int32,
+    "skills_offsets": np.int64,
+    "locations_codes": np.int32,
+    "locations_offsets": np.int64,
+}
+
+# "2-7 yrs", "5 to 8 years", "10+ yrs" or "3 yrs"
+EXPERIENCE_PATTERN = re.compile(r"(\d+)\s*(?:-|to)\s*(\d+)|(\d+)\s*(\+?)")
+OPEN_ENDED_YEARS = 99
+
+
+# Same cleanup load_data() has always applied: lowercase everything and split the
+# multi-valued columns. List entries are also stripped and deduplicated per posting.
+# Only postings without a role or company are dropped; other gaps become empty.
+def normalize_jobs(df):
+    df = df.reindex(columns=list(COLUMNS)).dropna(subset=list(REQUIRED_COLUMNS))
+    df = df.fillna("").apply(lambda x: x.astype(str).str.lower())
+    for column in LIST_COLUMNS:
+        df[column] = df[column].str.split(LIST_SEPARATORS[column]).map(
+            lambda values: list(dict.fromkeys(v.strip() for v in values if v.strip()))
+        )
+    return df
+
+
+# 64-bit fingerprint of (role, company, locations) used to spot reposted jobs
+def content_hashes(df):
+    hashes = [
+        int.from_bytes(hashlib.blake2b("\x1f".join([role.strip(), company.strip(), *sorted(locations)]).encode(),
+                                       digest_size=8).digest(), "little")
+        for role, company, locations in zip(df["roles"], df["companies"], df["locations"])
+    ]
+    return np.array(hashes, dtype=np.uint64)
+
+
+# Codes for values, extending categories (and lookup, value -> code) with values not
+# seen before. New values are added in sorted order; existing codes never change.
+def encode_values(values, lookup, categories):
+    local, uniques = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    mapping = np.empty(len(uniques), dtype=np.int32)
+    for i, value in enumerate(uniques):
+        value = str(value)
+        if value not in lookup:
+            lookup[value] = len(categories)
+            categories.append(value)
+        mapping[i] = lookup[value]
+    return mapping[local]
+
+
+# (min, max) years of experience, or (-1, -1) when the text has no number in it
+def parse_experience(text):
+    match = EXPERIENCE_PATTERN.search(text)
+    if match is None:
+        return -1, -1
+    if match.group(1) is not None:
+        low, high = int(match.group(1)), int(match.group(2))
+        return min(low, high), max(low, high)
+    years = int(match.group(3))
+    return years, OPEN_ENDED_YEARS if match.group(4) else years
+
+
+def source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {"source": os.path.abspath(csv_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def read_meta(directory):
+    with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+# Write data after the first `length` items of an array file, dropping anything a
+# previous, interrupted append left beyond that point
+def append_array(directory, name, length, data):
+    path = os.path.join(directory, f"{name}.bin")
+    dtype = np.dtype(ARRAY_DTYPES[name])
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        f.truncate(length * dtype.itemsize)
+        f.seek(length * dtype.itemsize)
+        f.write(np.ascontiguousarray(data, dtype=dtype).tobytes())
+
+
+# Add normalized postings to the index in directory and update the per-category
+# counts kept in meta.json. With dedupe, postings whose content hash is already
+# stored (or repeats within df) are skipped. Returns the index labels of the
+# postings that were added and the number of duplicates skipped.
+def append_postings(directory, df, row_ids=None, dedupe=True):
+    meta = read_meta(directory)
+    rows = meta["rows"]
+    hashes = content_hashes(df)
+    duplicates = 0
+    if dedupe:
+        stored = np.fromfile(os.path.join(directory, "content_hash.bin"), dtype=np.uint64, count=rows)
+        keep = ~pd.Series(hashes).duplicated().to_numpy() & ~np.isin(hashes, stored)
+        duplicates = int((~keep).sum())
+        df, hashes = df[keep], hashes[keep]
+        row_ids = None if row_ids is None else np.asarray(row_ids)[keep]
+    if not len(df):
+        return df.index, duplicates
+
+    if row_ids is None:
+        row_ids = np.arange(meta["next_row_id"], meta["next_row_id"] + len(df))
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    with open(os.path.join(directory, "categories.json"), encoding="utf-8") as f:
+        categories = {column: values[:meta["categories"][column]] for column, values in json.load(f).items()}
+
+    appended = {"row_ids": row_ids, "content_hash": hashes}
+    codes = {}
+    for column in SCALAR_COLUMNS:
+        lookup = {value: code for code, value in enumerate(categories[column])}
+        codes[column] = appended[column] = encode_values(df[column].tolist(), lookup, categories[column])
+    bounds = np.array([parse_experience(text) for text in categories["experience"]], dtype=np.int16).reshape(-1, 2)
+    appended["experience_min"] = bounds[codes["experience"], 0]
+    appended["experience_max"] = bounds[codes["experience"], 1]
+
+    entries = dict(meta["entries"])
+    for column in LIST_COLUMNS:
+        lookup = {value: code for code, value in enumerate(categories[column])}
+        flat = [value for values in df[column] for value in values]
+        codes[column] = appended[f"{column}_codes"] = encode_values(flat, lookup, categories[column])
+        # Row i owns codes[offsets[i]:offsets[i + 1]]
+        appended[f"{column}_offsets"] = entries[column] + np.cumsum(df[column].map(len).to_numpy(dtype=np.int64))
+        entries[column] += len(flat)
+
+    for name, data in appended.items():
+        if name.endswith("_codes"):
+            length = meta["entries"][name[:-len("_codes")]]
+        elif name.endswith("_offsets"):
+            length = rows + 1
+        else:
+            length = rows
+        append_array(directory, name, length, data)
+
+    counts = {}
+    for column, values in categories.items():
+        column_counts = np.zeros(len(values), dtype=np.int64)
+        column_counts[:len(meta["counts"][column])] = meta["counts"][column]
+        column_counts += np.bincount(codes[column], minlength=len(values))
+        counts[column] = column_counts.tolist()
+
+    write_json(os.path.join(directory, "categories.json"), categories)
+    meta.update(
+        rows=rows + len(df),
+        entries=entries,
+        categories={column: len(values) for column, values in categories.items()},
+        counts=counts,
+        next_row_id=max(meta["next_row_id"], int(row_ids.max()) + 1),
+        updated_at=time.time(),
+    )
+    write_json(os.path.join(directory, "meta.json"), meta)
+    return df.index, duplicates
+
+
+# Raw postings from a CSV or JSONL file, chunk_size rows at a time
+def read_postings(path, chunk_size=5000):
+    if path.endswith((".jsonl", ".ndjson")):
+        chunks = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_size)
+    for chunk in chunks:
+        yield chunk.reset_index(drop=True)
+
+
+# Stream new postings into the index. Accepted postings are also appended to
+# log_path so that a rebuild from the CSV keeps them.
+def ingest(paths, directory=INDEX_DIR, chunk_size=5000, log_path=INGEST_LOG):
+    totals = {"received": 0, "rejected": 0, "duplicates": 0, "added": 0}
+    for path in paths:
+        for chunk in read_postings(path, chunk_size):
+            df = normalize_jobs(chunk)
+            added, duplicates = append_postings(directory, df)
+            totals["received"] += len(chunk)
+            totals["rejected"] += len(chunk) - len(df)
+            totals["duplicates"] += duplicates
+            totals["added"] += len(added)
+            if log_path and len(added):
+                records = chunk.reindex(columns=list(COLUMNS)).loc[added]
+                with open(log_path, "a", encoding="utf-8") as f:
+                    for record in records.astype(object).where(records.notna(), None).to_dict("records"):
+                        f.write(json.dumps(record) + "\n")
+            print(f"{path}: {totals['added']} added, {totals['duplicates']} duplicates, "
+                  f"{totals['rejected']} rejected so far", file=sys.stderr)
+    return totals
+
+
+def build_index(csv_path=CSV_PATH, out_dir=INDEX_DIR, log_path=INGEST_LOG):
+    df = normalize_jobs(pd.read_csv(csv_path, index_col=0))
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Unlink rather than truncate: processes that still map the old files keep them
+    for name in ARRAY_DTYPES:
+        path = os.path.join(out_dir, f"{name}.bin")
+        if os.path.exists(path):
+            os.remove(path)
+        open(path, "wb").close()
+    write_json(os.path.join(out_dir, "categories.json"), {column: [] for column in SCALAR_COLUMNS + LIST_COLUMNS})
+    append_array(out_dir, "skills_offsets", 0, [0])
+    append_array(out_dir, "locations_offsets", 0, [0])
+    meta = dict(
+        source_signature(csv_path),
+        format=FORMAT_VERSION,
+        rows=0,
+        entries={column: 0 for column in LIST_COLUMNS},
+        categories={column: 0 for column in SCALAR_COLUMNS + LIST_COLUMNS},
+        counts={column: [] for column in SCALAR_COLUMNS + LIST_COLUMNS},
+        next_row_id=int(df.index.max()) + 1 if len(df) else 0,
+        built_at=time.time(),
+    )
+    write_json(os.path.join(out_dir, "meta.json"), meta)
+
+    append_postings(out_dir, df, row_ids=df.index.to_numpy(dtype=np.int64), dedupe=False)
+    if log_path and os.path.exists(log_path):
+        for chunk in read_postings(log_path):
+            append_postings(out_dir, normalize_jobs(chunk))
+    return load_index(out_dir)
+
+
+# Read-only view over an index directory. Arrays are memory-mapped, so every
+# Streamlit session shares the same pages.
+class JobIndex:
+    def __init__(self, directory, mmap=True):
+        self.directory = directory
+        self.meta = read_meta(directory)
+        with open(os.path.join(directory, "categories.json"), encoding="utf-8") as f:
+            self.categories = {
+                column: np.array(values[:self.meta["categories"][column]], dtype=object)
+                for column, values in json.load(f).items()
+            }
+
+        def load(name, length):
+            path = os.path.join(directory, f"{name}.bin")
+            if mmap and length:
+                return np.memmap(path, dtype=ARRAY_DTYPES[name], mode="r", shape=(length,))
+            return np.fromfile(path, dtype=ARRAY_DTYPES[name], count=length)
+
+        rows = self.meta["rows"]
+        self.row_ids = load("row_ids", rows)
+        self.content_hash = load("content_hash", rows)
+        self.experience_min = load("experience_min", rows)
+        self.experience_max = load("experience_max", rows)
+        self.codes = {column: load(column, rows) for column in SCALAR_COLUMNS}
+        self.offsets = {}
+        for column in LIST_COLUMNS:
+            self.codes[column] = load(f"{column}_codes", self.meta["entries"][column])
+            self.offsets[column] = load(f"{column}_offsets", rows + 1)
+        self._ranks = {}
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def values(self, column):
+        return self.categories[column][self.codes[column]]
+
+    def lists(self, column):
+        values = self.categories[column][self.codes[column]]
+        offsets = self.offsets[column]
+        return [list(values[offsets[i]:offsets[i + 1]]) for i in range(len(self))]
+
+    # Postings (or list entries) per category, maintained as postings are added
+    def counts(self, column):
+        return np.array(self.meta["counts"][column], dtype=np.int64)
+
+    # Occurrences of each category, most frequent first
+    def value_counts(self, column):
+        series = pd.Series(self.counts(column), index=self.categories[column], name="count")
+        return series[series > 0].sort_values(ascending=False, kind="stable")
+
+    # Categories in alphabetical order. Codes are assigned as values first appear, so
+    # after ingestion they are no longer sorted themselves.
+    def category_order(self, column):
+        return np.argsort(self.categories[column].astype(str), kind="stable")
+
+    # Alphabetical position of every code
+    def category_ranks(self, column):
+        if column not in self._ranks:
+            ranks = np.empty(len(self.categories[column]), dtype=np.int64)
+            ranks[self.category_order(column)] = np.arange(len(ranks))
+            self._ranks[column] = ranks
+        return self._ranks[column]
+
+    # Display-ready, flattened copy of the postings for the job listings. Title-casing
+    # happens once per category and list cells are joined once, not on every rerun.
+    def listing_frame(self):
+        titled = {column: np.array([c.title() for c in self.categories[column]], dtype=object) for column in self.categories}
+        joined = {}
+        for column in LIST_COLUMNS:
+            values = titled[column][self.codes[column]]
+            offsets = self.offsets[column]
+            joined[column] = [", ".join(values[offsets[i]:offsets[i + 1]]) for i in range(len(self))]
+        roles = self.values("roles")
+        companies = self.values("companies")
+        return pd.DataFrame({
+            "Title": [f"{role} at {company}" for role, company in zip(roles, companies)],
+            "Role": titled["roles"][self.codes["roles"]],
+            "Company": titled["companies"][self.codes["companies"]],
+            "Experience": self.values("experience"),
+            "Locations": joined["locations"],
+            "Skills": joined["skills"],
+        }, index=self.row_ids)
+
+    # Order row positions by a column, alphabetically through the category ranks; the
+    # sort is stable so ties keep posting order
+    def sort_positions(self, positions, column=None):
+        if column is None:
+            return positions
+        if column == "experience":
+            # Numerically by minimum, then maximum years
+            order = np.lexsort((self.experience_max[positions], self.experience_min[positions]))
+            return positions[order]
+        return positions[np.argsort(self.category_ranks(column)[self.codes[column][positions]], kind="stable")]
+
+    # Experience categories ordered numerically ("2-5 yrs" before "10-15 yrs")
+    def experience_order(self):
+        bounds = np.array([parse_experience(text) for text in self.categories["experience"]], dtype=np.int64).reshape(-1, 2)
+        return np.lexsort((self.category_ranks("experience"), bounds[:, 1], bounds[:, 0]))
+
+    # Postings open to a candidate with N years, for N = 0..the highest bounded
+    # requirement. Open-ended ranges ("10+ yrs") count up to that point.
+    def experience_coverage(self):
+        mins = np.asarray(self.experience_min, dtype=np.int64)
+        maxs = np.asarray(self.experience_max, dtype=np.int64)
+        valid = mins >= 0
+        if not valid.any():
+            return np.zeros(0, dtype=np.int64)
+        bounded = maxs[valid & (maxs != OPEN_ENDED_YEARS)]
+        cap = int(max(bounded.max() if len(bounded) else 0, mins[valid].max()))
+        low = mins[valid]
+        high = np.minimum(maxs[valid], cap)
+        changes = np.bincount(low, minlength=cap + 2) - np.bincount(high + 1, minlength=cap + 2)
+        return np.cumsum(changes)[:cap + 1]
+
+    # The DataFrame load_data() used to return, rebuilt from the index
+    def to_frame(self):
+        frame = pd.DataFrame({column: self.values(column) for column in ("roles", "companies")}, index=self.row_ids)
+        frame["locations"] = self.lists("locations")
+        frame["experience"] = self.values("experience")
+        frame["skills"] = self.lists("skills")
+        return frame
+
+
+def load_index(directory=INDEX_DIR, mmap=True):
+    return JobIndex(directory, mmap=mmap)
+
+
+# Cheap change marker for the index on disk and the CSV it is built from, so an edited
+# or replaced CSV is picked up even before the index has been rebuilt (None parts for
+# files that do not exist yet)
+def index_version(directory=INDEX_DIR, csv_path=CSV_PATH):
+    version = []
+    for path in (os.path.join(directory, "meta.json"), csv_path):
+        try:
+            stat = os.stat(path)
+            version.extend((stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            version.extend((None, None))
+    return tuple(version)
+
+
+# Use the index on disk if it matches the CSV, otherwise (re)build it first
+def load_or_build_index(csv_path=CSV_PATH, directory=INDEX_DIR):
+    meta_path = os.path.join(directory, "meta.json")
+    if os.path.exists(meta_path):
+        meta = read_meta(directory)
+        signature = source_signature(csv_path)
+        if meta.get("format") == FORMAT_VERSION and all(meta.get(k) == v for k, v in signature.items()):
+            return load_index(directory)
+    return build_index(csv_path, directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalize the job postings CSV into a columnar index.")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--out", default=INDEX_DIR)
+    parser.add_argument("--ingest", nargs="+", metavar="FILE",
+                        help="append new postings from CSV/JSONL files instead of rebuilding")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--log", default=INGEST_LOG, help="where ingested postings are recorded for rebuilds")
+    args = parser.parse_args()
+    if args.ingest:
+        load_or_build_index(args.csv, args.out)
+        totals = ingest(args.ingest, args.out, args.chunk_size, args.log)
+        print(json.dumps(totals))
+    else:
+        index = build_index(args.csv, args.out, args.log)
+        print(f"Indexed {len(index)} postings into {args.out}")
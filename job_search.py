@@ -0,0 +1,118 @@
+import re
+import numpy as np
+
+# Columns offered as multi-select filters in the Job Listings section
+FACET_COLUMNS = ("companies", "experience", "locations", "skills")
+# Columns whose words can be found through the free-text search box
+TEXT_COLUMNS = ("roles", "skills")
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#.]+")
+
+
+# Group the rows of each code together: rows[ptr[c]:ptr[c + 1]] are the (sorted)
+# rows that contain code c
+def build_postings(codes, rows, category_count):
+    order = np.argsort(codes, kind="stable")
+    ptr = np.zeros(category_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=category_count), out=ptr[1:])
+    return ptr, rows[order]
+
+
+# Inverted index over a JobIndex. Filters within one facet are OR'ed, facets and
+# search words are AND'ed. Matches are kept as boolean row bitmaps.
+class SearchIndex:
+    def __init__(self, job_index):
+        self.job_index = job_index
+        self.row_count = len(job_index)
+        self.entry_rows = {}
+        self.postings = {}
+        self.total_counts = {}
+        for column in set(FACET_COLUMNS) | set(TEXT_COLUMNS):
+            codes = np.asarray(job_index.codes[column])
+            if column in job_index.offsets:
+                rows = np.repeat(np.arange(self.row_count), np.diff(job_index.offsets[column]))
+            else:
+                rows = np.arange(self.row_count)
+            self.entry_rows[column] = rows
+            self.postings[column] = build_postings(codes, rows, len(job_index.categories[column]))
+            self.total_counts[column] = np.diff(self.postings[column][0])
+        self._build_text_index()
+
+        # Rows sorted by minimum and by maximum years of experience, so "I have N years"
+        # is two binary searches: rows with min <= N, minus rows with max < N
+        mins = np.asarray(job_index.experience_min)
+        maxs = np.asarray(job_index.experience_max)
+        self._rows_by_min = np.argsort(mins, kind="stable")
+        self._sorted_mins = mins[self._rows_by_min]
+        self._rows_by_max = np.argsort(maxs, kind="stable")
+        self._sorted_maxs = maxs[self._rows_by_max]
+
+    def rows(self, column, code):
+        ptr, rows = self.postings[column]
+        return rows[ptr[code]:ptr[code + 1]]
+
+    # Words of role titles and skills, sorted so that a prefix selects a contiguous
+    # range of tokens and therefore one contiguous slice of token_rows
+    def _build_text_index(self):
+        sources = {}
+        for column in TEXT_COLUMNS:
+            for code, value in enumerate(self.job_index.categories[column]):
+                for token in TOKEN_PATTERN.findall(value):
+                    sources.setdefault(token, []).append(self.rows(column, code))
+        self.tokens = sorted(sources)
+        token_rows = [np.unique(np.concatenate(sources[token])) for token in self.tokens]
+        self.token_ptr = np.zeros(len(self.tokens) + 1, dtype=np.int64)
+        np.cumsum([len(rows) for rows in token_rows], out=self.token_ptr[1:])
+        self.token_rows = np.concatenate(token_rows) if token_rows else np.zeros(0, dtype=np.int64)
+        self._token_array = np.array(self.tokens, dtype=object)
+
+    def facet_mask(self, column, codes):
+        ptr, rows = self.postings[column]
+        mask = np.zeros(self.row_count, dtype=bool)
+        for code in codes:
+            mask[rows[ptr[code]:ptr[code + 1]]] = True
+        return mask
+
+    def text_mask(self, text):
+        mask = np.ones(self.row_count, dtype=bool)
+        for word in TOKEN_PATTERN.findall(text.lower()):
+            lo = np.searchsorted(self._token_array, word, side="left")
+            hi = np.searchsorted(self._token_array, word + "\uffff", side="left")
+            word_mask = np.zeros(self.row_count, dtype=bool)
+            word_mask[self.token_rows[self.token_ptr[lo]:self.token_ptr[hi]]] = True
+            mask &= word_mask
+        return mask
+
+    def experience_mask(self, years):
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[self._rows_by_min[:np.searchsorted(self._sorted_mins, years, side="right")]] = True
+        mask[self._rows_by_max[:np.searchsorted(self._sorted_maxs, years, side="left")]] = False
+        return mask
+
+    # Rows per option of a facet, restricted to the rows allowed by mask
+    def facet_counts(self, column, mask):
+        if mask.all():
+            return self.total_counts[column]
+        codes = self.job_index.codes[column]
+        return np.bincount(codes[mask[self.entry_rows[column]]], minlength=len(self.job_index.categories[column]))
+
+    # selected: {facet column: [codes]}; years: the candidate's experience, if given.
+    # Returns the matching rows as a bitmap and, per facet, option counts that honour
+    # every filter except the facet's own.
+    def query(self, selected, text="", years=None):
+        masks = {column: self.facet_mask(column, codes) for column, codes in selected.items() if len(codes)}
+        base = self.text_mask(text) if text.strip() else np.ones(self.row_count, dtype=bool)
+        if years is not None:
+            base &= self.experience_mask(years)
+
+        mask = base.copy()
+        for facet_mask in masks.values():
+            mask &= facet_mask
+
+        counts = {}
+        for column in FACET_COLUMNS:
+            others = base.copy()
+            for other, facet_mask in masks.items():
+                if other != column:
+                    others &= facet_mask
+            counts[column] = self.facet_counts(column, others)
+        return mask, counts
@@ -0,0 +1,378 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from ats_score import tokenize
+from job_index import CSV_PATH, INDEX_DIR, load_or_build_index
+
+VECTOR_DIR = "job_vectors"
+FORMAT_VERSION = 1
+# "auto" uses a sentence-transformers model when one can be loaded, otherwise TF-IDF + SVD
+BACKEND = os.getenv("JOB_VECTORS_BACKEND", "auto")
+EMBEDDING_MODEL = os.getenv("JOB_VECTORS_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+SVD_DIMENSIONS = int(os.getenv("JOB_VECTORS_DIMENSIONS", "128"))
+MAX_FEATURES = 20000
+# Rows scored per matrix multiplication, to bound memory on large indexes
+SEARCH_CHUNK_ROWS = 65536
+
+
+# The text that represents a posting: role, skills and experience
+def posting_documents(frame):
+    return [
+        f"{role}. {', '.join(skills)}. {experience}"
+        for role, skills, experience in zip(frame["roles"], frame["skills"], frame["experience"])
+    ]
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+# Documents as a sparse TF-IDF matrix in CSR form (ptr, indices, values): row i owns
+# indices[ptr[i]:ptr[i + 1]]. Term frequencies are sublinear, rows are L2-normalized.
+def tfidf_rows(documents, vocabulary, idf):
+    ptr = np.zeros(len(documents) + 1, dtype=np.int64)
+    indices, values = [], []
+    for i, document in enumerate(documents):
+        terms, counts = np.unique(
+            np.array([vocabulary[t] for t in tokenize(document) if t in vocabulary], dtype=np.int64), return_counts=True
+        )
+        weights = (1 + np.log(counts)) * idf[terms]
+        norm = np.linalg.norm(weights)
+        indices.append(terms)
+        values.append(weights / norm if norm > 0 else weights)
+        ptr[i + 1] = ptr[i] + len(terms)
+    indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+    values = np.concatenate(values) if values else np.zeros(0)
+    return ptr, indices, values
+
+
+# Vocabulary (most frequent MAX_FEATURES terms, sorted) and smoothed IDF weights
+def fit_tfidf(documents):
+    document_frequency = {}
+    for document in documents:
+        for term in set(tokenize(document)):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    terms = sorted(sorted(document_frequency, key=lambda t: (-document_frequency[t], t))[:MAX_FEATURES])
+    df = np.array([document_frequency[t] for t in terms], dtype=np.float64)
+    return terms, np.log((1 + len(documents)) / (1 + df)) + 1
+
+
+def csr_to_dense(csr, columns):
+    ptr, indices, values = csr
+    dense = np.zeros((len(ptr) - 1, columns))
+    dense[np.repeat(np.arange(len(ptr) - 1), np.diff(ptr)), indices] = values
+    return dense
+
+
+# Sparse (CSR) times dense
+def csr_dot(csr, dense):
+    ptr, indices, values = csr
+    out = np.zeros((len(ptr) - 1, dense.shape[1]))
+    nonempty = np.diff(ptr) > 0
+    if nonempty.any():
+        out[nonempty] = np.add.reduceat(values[:, None] * dense[indices], ptr[:-1][nonempty])
+    return out
+
+
+# Transposed sparse (CSR) times dense
+def csr_transpose_dot(csr, dense, columns):
+    ptr, indices, values = csr
+    rows = np.repeat(np.arange(len(ptr) - 1), np.diff(ptr))
+    out = np.zeros((columns, dense.shape[1]))
+    np.add.at(out, indices, values[:, None] * dense[rows])
+    return out
+
+
+# Offline fallback embedder: TF-IDF over the posting vocabulary, reduced to a few
+# dense dimensions with a randomized truncated SVD
+class TfidfSvdEmbedder:
+    backend = "tfidf-svd"
+
+    def __init__(self, terms, idf, components):
+        self.terms = list(terms)
+        self.vocabulary = {term: i for i, term in enumerate(self.terms)}
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.components = np.asarray(components, dtype=np.float64)
+
+    @property
+    def dimensions(self):
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, documents, dimensions=SVD_DIMENSIONS, power_iterations=2, seed=0):
+        terms, idf = fit_tfidf(documents)
+        csr = tfidf_rows(documents, {t: i for i, t in enumerate(terms)}, idf)
+
+        # Randomized range finder (Halko et al.) on the document x term matrix
+        rank = max(1, min(dimensions, len(documents), len(terms)))
+        sample = min(rank + 10, len(documents), len(terms))
+        y = csr_dot(csr, np.random.default_rng(seed).standard_normal((len(terms), sample)))
+        q, _ = np.linalg.qr(y)
+        for _ in range(power_iterations):
+            q, _ = np.linalg.qr(csr_transpose_dot(csr, q, len(terms)))
+            q, _ = np.linalg.qr(csr_dot(csr, q))
+        b = csr_transpose_dot(csr, q, len(terms)).T
+        _, _, vt = np.linalg.svd(b, full_matrices=False)
+        return cls(terms, idf, vt[:rank].T)
+
+    def embed(self, documents):
+        csr = tfidf_rows(documents, self.vocabulary, self.idf)
+        return normalize_rows(csr_dot(csr, self.components)).astype(np.float32)
+
+    def save(self, directory):
+        with open(os.path.join(directory, "tfidf_terms.json"), "w", encoding="utf-8") as f:
+            json.dump(self.terms, f)
+        np.save(os.path.join(directory, "tfidf_idf.npy"), self.idf)
+        np.save(os.path.join(directory, "tfidf_components.npy"), self.components)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "tfidf_terms.json"), encoding="utf-8") as f:
+            terms = json.load(f)
+        return cls(terms, np.load(os.path.join(directory, "tfidf_idf.npy")),
+                   np.load(os.path.join(directory, "tfidf_components.npy")))
+
+
+# Local CPU sentence embedding model; sentence-transformers is optional
+class SentenceEmbedder:
+    backend = "sentence-transformers"
+
+    def __init__(self, model_name=EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    @property
+    def dimensions(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def embed(self, documents):
+        vectors = self.model.encode(list(documents), batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(documents), -1)
+
+    def save(self, directory):
+        pass
+
+
+def fit_embedder(documents, backend=BACKEND):
+    if backend in ("auto", SentenceEmbedder.backend):
+        try:
+            return SentenceEmbedder()
+        except Exception as e:
+            if backend != "auto":
+                raise
+            print(f"Sentence embedding model unavailable ({e}); falling back to TF-IDF + SVD")
+    return TfidfSvdEmbedder.fit(documents)
+
+
+def load_embedder(directory, meta):
+    if meta["backend"] == SentenceEmbedder.backend:
+        return SentenceEmbedder(meta["model"])
+    return TfidfSvdEmbedder.load(directory)
+
+
+def write_meta(directory, meta):
+    path = os.path.join(directory, "meta.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+# Embed every posting of a JobIndex into out_dir
+def build_vectors(job_index, out_dir=VECTOR_DIR, backend=BACKEND):
+    documents = posting_documents(job_index.to_frame())
+    embedder = fit_embedder(documents, backend)
+    os.makedirs(out_dir, exist_ok=True)
+    embedder.save(out_dir)
+    meta = {
+        "format": FORMAT_VERSION,
+        "backend": embedder.backend,
+        "model": getattr(embedder, "model_name", None),
+        "dimensions": embedder.dimensions,
+        "index_built_at": job_index.meta["built_at"],
+        "rows": 0,
+        "built_at": time.time(),
+    }
+    for name in ("vectors.f32", "row_ids.i64"):
+        open(os.path.join(out_dir, name), "wb").close()
+    write_meta(out_dir, meta)
+    vectors = JobVectors(out_dir, embedder)
+    vectors.append(np.asarray(job_index.row_ids), documents)
+    return vectors
+
+
+# Unit-length float32 posting vectors in a flat file, memory-mapped for search.
+# New postings are appended in place; meta.json holds the row count and is written
+# last, so a half-written append is ignored (and overwritten by the next one).
+class JobVectors:
+    def __init__(self, directory=VECTOR_DIR, embedder=None):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.embedder = embedder or load_embedder(directory, self.meta)
+        self._open()
+
+    def _open(self):
+        rows, dimensions = self.meta["rows"], self.meta["dimensions"]
+        if rows:
+            self.vectors = np.memmap(os.path.join(self.directory, "vectors.f32"), dtype=np.float32, mode="r",
+                                     shape=(rows, dimensions))
+            self.row_ids = np.memmap(os.path.join(self.directory, "row_ids.i64"), dtype=np.int64, mode="r", shape=(rows,))
+        else:
+            self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+            self.row_ids = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def append(self, row_ids, documents):
+        if not len(documents):
+            return 0
+        vectors = self.embedder.embed(documents)
+        rows = self.meta["rows"]
+        for name, data, itemsize in (("vectors.f32", vectors, 4 * self.meta["dimensions"]),
+                                     ("row_ids.i64", np.asarray(row_ids, dtype=np.int64), 8)):
+            with open(os.path.join(self.directory, name), "r+b") as f:
+                f.truncate(rows * itemsize)
+                f.seek(rows * itemsize)
+                f.write(np.ascontiguousarray(data).tobytes())
+        self.meta = dict(self.meta, rows=rows + len(documents), updated_at=time.time())
+        write_meta(self.directory, self.meta)
+        self._open()
+        return len(documents)
+
+    # Embed and add the postings of job_index that are not in the vectors yet
+    def sync(self, job_index):
+        missing = np.flatnonzero(~np.isin(np.asarray(job_index.row_ids), np.asarray(self.row_ids)))
+        if not len(missing):
+            return 0
+        frame = job_index.to_frame().iloc[missing]
+        return self.append(frame.index.to_numpy(dtype=np.int64), posting_documents(frame))
+
+    # Top-k rows for each query vector by cosine similarity: one matrix product per
+    # chunk of rows, keeping the running best k per query
+    def search(self, queries, k=10):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_positions = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(self), SEARCH_CHUNK_ROWS):
+            scores = queries @ self.vectors[start:start + SEARCH_CHUNK_ROWS].T
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, top, axis=1)
+            else:
+                top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_positions = np.concatenate([best_positions, top + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_positions = np.take_along_axis(best_positions, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_positions, order, axis=1)
+
+    # [(row id, similarity)] of the k postings closest to text
+    def match(self, text, k=10):
+        scores, positions = self.search(self.embedder.embed([text]), k)
+        return [(int(self.row_ids[p]), float(s)) for p, s in zip(positions[0], scores[0])]
+
+
+def load_vectors(directory=VECTOR_DIR):
+    return JobVectors(directory)
+
+
+# Use the vectors on disk, appending any postings added to the job index since;
+# build them from scratch when missing, written by another format/backend, or made
+# for an earlier build of the job index (row ids may have been reassigned)
+def load_or_build_vectors(job_index, directory=VECTOR_DIR, backend=BACKEND):
+    meta_path = os.path.join(directory, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if (meta.get("format") == FORMAT_VERSION and backend in ("auto", meta.get("backend"))
+                and meta.get("index_built_at") == job_index.meta["built_at"]):
+            vectors = load_vectors(directory)
+            vectors.sync(job_index)
+            return vectors
+    return build_vectors(job_index, directory, backend)
+
+
+# Build time, query latency and recall@k against exact cosine search over the full
+# TF-IDF vectors. Queries are postings with half of their skills dropped.
+def benchmark(job_index, backend=BACKEND, k=10, queries=200, seed=0):
+    frame = job_index.to_frame()
+    documents = posting_documents(frame)
+    rng = np.random.default_rng(seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        vectors = build_vectors(job_index, directory, backend)
+        build_seconds = time.perf_counter() - started
+
+        picks = rng.choice(len(frame), size=min(queries, len(frame)), replace=False)
+        texts = []
+        for position in picks:
+            skills = list(frame["skills"].iat[position])
+            kept = [s for s in skills if rng.random() < 0.5] or skills[:1]
+            texts.append(f"{frame['roles'].iat[position]}. {', '.join(kept)}.")
+
+        latencies = []
+        for text in texts:
+            started = time.perf_counter()
+            vectors.match(text, k)
+            latencies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        _, found = vectors.search(vectors.embedder.embed(texts), k)
+        batch_seconds = time.perf_counter() - started
+
+        terms, idf = fit_tfidf(documents)
+        vocabulary = {term: i for i, term in enumerate(terms)}
+        dense_queries = csr_to_dense(tfidf_rows(texts, vocabulary, idf), len(terms))
+        exact_scores = csr_dot(tfidf_rows(documents, vocabulary, idf), dense_queries.T).T
+        exact = np.argsort(-exact_scores, axis=1, kind="stable")[:, :k]
+        recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, exact)])
+
+        latencies = np.array(latencies) * 1000
+        return {
+            "backend": vectors.meta["backend"],
+            "rows": len(vectors),
+            "dimensions": vectors.meta["dimensions"],
+            "build_seconds": round(build_seconds, 3),
+            "query_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+            "query_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+            "batch_queries": len(texts),
+            "batch_ms_total": round(batch_seconds * 1000, 3),
+            f"recall_at_{k}": round(float(recall), 3),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed job postings into a memory-mapped vector index.")
+    parser.add_argument("command", choices=["build", "update", "benchmark"],
+                        help="build from scratch, append postings missing from the index, or benchmark")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--index", default=INDEX_DIR)
+    parser.add_argument("--out", default=VECTOR_DIR)
+    parser.add_argument("--backend", choices=["auto", "tfidf-svd", "sentence-transformers"], default=BACKEND)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    job_index = load_or_build_index(args.csv, args.index)
+    if args.command == "benchmark":
+        print(json.dumps(benchmark(job_index, args.backend, args.k, args.queries)))
+        return
+    if args.command == "build" and os.path.isdir(args.out):
+        shutil.rmtree(args.out)
+    vectors = load_or_build_vectors(job_index, args.out, args.backend)
+    print(f"{len(vectors)} postings in {args.out} ({vectors.meta['backend']}, {vectors.meta['dimensions']} dimensions)")
+
+
+if __name__ == "__main__":
+    main()
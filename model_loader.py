@@ -0,0 +1,83 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import torch
+from accelerate import init_empty_weights
+from transformers import AutoConfig, AutoTokenizer, AutoModelForCausalLM
+
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+# Map a safetensors file copy-on-write and build tensors that point straight into
+# the mapping, so worker processes loading the same snapshot share its pages
+def mmap_safetensors(path):
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_size = struct.unpack("<Q", mapping[:8])[0]
+    header = json.loads(mapping[8:8 + header_size])
+    data_start = 8 + header_size
+
+    state_dict = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+        tensor = torch.frombuffer(mapping, dtype=dtype, count=count, offset=data_start + begin)
+        state_dict[name] = tensor.reshape(info["shape"])
+    return state_dict
+
+
+def load_mmapped_model(snapshot_dir):
+    files = sorted(glob.glob(os.path.join(snapshot_dir, "*.safetensors")))
+    if not files:
+        raise FileNotFoundError(f"No .safetensors weights found in {snapshot_dir}")
+
+    state_dict = {}
+    for path in files:
+        state_dict.update(mmap_safetensors(path))
+
+    # Build the model without allocating parameters (buffers such as attention masks
+    # are still created), then adopt the mapped tensors in place
+    config = AutoConfig.from_pretrained(snapshot_dir)
+    with init_empty_weights():
+        model = AutoModelForCausalLM.from_config(config)
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise ValueError(f"Snapshot {snapshot_dir} is missing weights: {', '.join(missing)}")
+    return model.eval()
+
+
+# Load the tokenizer and model from the Hub or a local snapshot directory
+def load_model(model_name, mmap_weights=False):
+    local = os.path.isdir(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=local)
+    if mmap_weights and local:
+        model = load_mmapped_model(model_name)
+    else:
+        if mmap_weights:
+            print("Memory-mapped weights need a local snapshot directory, loading normally.")
+        model = AutoModelForCausalLM.from_pretrained(model_name, local_files_only=local, low_cpu_mem_usage=True)
+        model.eval()
+
+    # Left-pad so that prompts of different lengths can share one generate call
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer, model
@@ -0,0 +1,234 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+from transformers import AutoTokenizer
+from inference_profiles import apply_profile, configure_threads
+from model_loader import load_model
+from roadmap_cache import RoadmapCache, cache_namespace, roadmap_key
+from roadmap_generation import DECODING_PRESETS, DEFAULT_PRESET, build_prompt, decoding_variant, generate_roadmaps
+
+DEFAULT_MODEL = "asthaaa300/results"
+
+
+def read_jsonl(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+# Pull (career goal, skills, learning preference) out of the prompts in career_data.csv
+def read_career_data(path):
+    requests = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            fields = {}
+            for line in row["text"].splitlines():
+                name, _, value = line.partition(":")
+                fields[name.strip().lower()] = value.strip()
+            if fields.get("career goal") and fields.get("skills") and fields.get("learning preference"):
+                requests.append({
+                    "career_goal": fields["career goal"],
+                    "skills": [skill.strip() for skill in fields["skills"].split(",") if skill.strip()],
+                    "learning_preference": fields["learning preference"],
+                })
+    return requests
+
+
+# Every combination of the goals, skill sets and learning preferences seen in the inputs
+def all_combinations(requests):
+    goals = {request["career_goal"]: None for request in requests}
+    skill_sets = {tuple(request["skills"]): None for request in requests}
+    preferences = {request["learning_preference"]: None for request in requests}
+    return [
+        {"career_goal": goal, "skills": list(skills), "learning_preference": preference}
+        for goal, skills, preference in itertools.product(goals, skill_sets, preferences)
+    ]
+
+
+# Same key as RoadmapCache.key for a cache in this namespace
+def request_key(request, namespace, variant):
+    return roadmap_key(request["career_goal"], request["skills"], request["learning_preference"], namespace, variant)
+
+
+def validate_request(request):
+    if not isinstance(request, dict):
+        raise ValueError("Each input must be a JSON object.")
+    if not request.get("career_goal") or not request.get("skills") or not request.get("learning_preference"):
+        raise ValueError("All fields (career_goal, skills, learning_preference) are required.")
+    if not isinstance(request["skills"], list):
+        raise ValueError("skills must be a list.")
+    return request
+
+
+# Drop requests that normalize to the same cache entry or were already completed
+def unique_requests(requests, namespace, variant, done=()):
+    seen = set(done)
+    unique = []
+    for request in requests:
+        key = request_key(request, namespace, variant)
+        if key not in seen:
+            seen.add(key)
+            unique.append(request)
+    return unique
+
+
+# Group prompts of similar token length so batches carry as little padding as possible
+def length_sorted_batches(tokenizer, requests, batch_size):
+    if not requests:
+        return
+    prompts = [build_prompt(r["career_goal"], r["skills"], r["learning_preference"]) for r in requests]
+    lengths = [len(ids) for ids in tokenizer(prompts).input_ids]
+    order = sorted(range(len(requests)), key=lengths.__getitem__)
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        yield chunk, [requests[i] for i in chunk], [prompts[i] for i in chunk]
+
+
+# model_name and profile are recorded so the roadmaps only ever seed a cache for the
+# same model and inference profile
+def generate_records(tokenizer, model, batch, prompts, model_name, profile, preset, max_new_tokens):
+    roadmaps, _ = generate_roadmaps(tokenizer, model, prompts, preset, max_new_tokens)
+    namespace = cache_namespace(model_name, profile)
+    variant = decoding_variant(preset, max_new_tokens)
+    records = []
+    for request, roadmap in zip(batch, roadmaps):
+        records.append({
+            "key": request_key(request, namespace, variant),
+            "career_goal": request["career_goal"],
+            "skills": request["skills"],
+            "learning_preference": request["learning_preference"],
+            "model": model_name,
+            "profile": profile,
+            "preset": preset,
+            "max_new_tokens": max_new_tokens,
+            "roadmap": roadmap,
+        })
+    return records
+
+
+# Load previously generated records into a RoadmapCache. They are pinned, so the
+# cache TTL never sends these requests back to the model. Records made by another
+# model or inference profile (or without either) are skipped. Returns the number of
+# seeded and skipped records.
+def seed_cache(cache, records):
+    seeded = skipped = 0
+    for record in records:
+        if cache_namespace(record.get("model"), record.get("profile")) != cache.namespace:
+            skipped += 1
+            continue
+        variant = decoding_variant(record["preset"], record["max_new_tokens"])
+        key = cache.key(record["career_goal"], record["skills"], record["learning_preference"], variant)
+        cache.set(key, record["roadmap"], pinned=True)
+        seeded += 1
+    return seeded, skipped
+
+
+# Each worker process loads its own copy of the model once
+_worker_model = None
+
+
+def _init_worker(model_name, profile, num_threads):
+    global _worker_model
+    configure_threads(num_threads)
+    tokenizer, model = load_model(model_name)
+    _worker_model = (tokenizer, apply_profile(model, profile))
+
+
+def _generate_in_worker(args):
+    batch, prompts, model_name, profile, preset, max_new_tokens = args
+    tokenizer, model = _worker_model
+    return generate_records(tokenizer, model, batch, prompts, model_name, profile, preset, max_new_tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute roadmaps for a list of requests (JSONL in, JSONL out).")
+    parser.add_argument("--input", help="JSONL file of requests, '-' for stdin")
+    parser.add_argument("--career-data", help="also take the requests found in this career_data.csv")
+    parser.add_argument("--combinations", action="store_true",
+                        help="expand the inputs to every goal x skill set x learning preference combination")
+    parser.add_argument("--output", required=True, help="JSONL file to append results to; reruns resume from it")
+    parser.add_argument("--model", default=os.getenv("ROADMAP_MODEL_PATH") or DEFAULT_MODEL)
+    parser.add_argument("--profile", default=os.getenv("ROADMAP_PROFILE", "fp32"))
+    parser.add_argument("--preset", choices=sorted(DECODING_PRESETS), default=DEFAULT_PRESET)
+    parser.add_argument("--max-new-tokens", type=int, default=int(os.getenv("ROADMAP_MAX_NEW_TOKENS", "280")))
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per worker")
+    parser.add_argument("--cache-db", help="also write the results into this roadmap cache database")
+    args = parser.parse_args()
+
+    requests = []
+    if args.input:
+        lines = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        requests.extend(validate_request(request) for request in read_jsonl(lines))
+    if args.career_data:
+        requests.extend(read_career_data(args.career_data))
+    if args.combinations:
+        requests = all_combinations(requests)
+
+    # Resume: skip everything already present in the output file. Keys include the
+    # model and profile, so a run with other settings does not count as done.
+    namespace = cache_namespace(args.model, args.profile)
+    variant = decoding_variant(args.preset, args.max_new_tokens)
+    done = set()
+    line = ""
+    if os.path.exists(args.output):
+        with open(args.output, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["key"])
+                except (ValueError, KeyError):
+                    # A run killed mid-write can leave a truncated last line
+                    continue
+    needs_newline = bool(line) and not line.endswith("\n")
+    requests = unique_requests(requests, namespace, variant, done)
+    print(f"{len(done)} roadmaps already done, {len(requests)} to generate.", file=sys.stderr)
+    if not requests:
+        return
+
+    cache = RoadmapCache(db_path=args.cache_db, namespace=namespace) if args.cache_db else None
+    if args.workers <= 1:
+        _init_worker(args.model, args.profile, args.threads)
+        tokenizer = _worker_model[0]
+    else:
+        # With worker processes the parent only needs the tokenizer to sort prompts by length
+        tokenizer = AutoTokenizer.from_pretrained(args.model, local_files_only=os.path.isdir(args.model))
+
+    jobs = [
+        (batch, prompts, args.model, args.profile, args.preset, args.max_new_tokens)
+        for _, batch, prompts in length_sorted_batches(tokenizer, requests, args.batch_size)
+    ]
+    if args.workers <= 1:
+        results = map(_generate_in_worker, jobs)
+    else:
+        pool = multiprocessing.get_context("spawn").Pool(
+            args.workers, initializer=_init_worker, initargs=(args.model, args.profile, args.threads)
+        )
+        results = pool.imap_unordered(_generate_in_worker, jobs)
+
+    # Append and flush after every batch so an interrupted run loses at most one batch
+    completed = 0
+    with open(args.output, "a", encoding="utf-8") as out:
+        if needs_newline:
+            out.write("\n")
+        for records in results:
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+            if cache is not None:
+                seed_cache(cache, records)
+            completed += len(records)
+            print(f"{completed}/{len(requests)} roadmaps generated", file=sys.stderr)
+
+    if args.workers > 1:
+        pool.close()
+        pool.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import base64
+import hashlib
+import io
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import pdf2image
+from tiered_cache import TieredCache
+
+RENDER_DPI = int(os.getenv("RESUME_DPI", "150"))
+RENDER_GRAYSCALE = os.getenv("RESUME_GRAYSCALE", "0") == "1"
+JPEG_QUALITY = int(os.getenv("RESUME_JPEG_QUALITY", "85"))
+# Pages wider than this (in pixels) are scaled down before encoding
+MAX_WIDTH = int(os.getenv("RESUME_MAX_WIDTH", "1700"))
+MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "5"))
+RENDER_THREADS = int(os.getenv("RESUME_RENDER_THREADS", "4"))
+
+
+# The pages of one uploaded resume, rasterized and JPEG-encoded once. The Gemini
+# payload and the preview are both built from these buffers.
+class ResumeDocument:
+    def __init__(self, digest, pages, page_count):
+        self.digest = digest
+        self.pages = pages
+        self.page_count = page_count
+
+    def gemini_parts(self):
+        return [{"mime_type": "image/jpeg", "data": base64.b64encode(page).decode()} for page in self.pages]
+
+    def preview(self):
+        return self.pages[0]
+
+
+def encode_jpeg(image, quality=JPEG_QUALITY, max_width=MAX_WIDTH):
+    if max_width and image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+# Rasterize only the given page; pdftoppm runs in its own process, so several of
+# these can run in parallel from a thread pool
+def render_page(pdf_bytes, page, dpi=RENDER_DPI, grayscale=RENDER_GRAYSCALE, quality=JPEG_QUALITY, max_width=MAX_WIDTH):
+    images = pdf2image.convert_from_bytes(pdf_bytes, dpi=dpi, first_page=page, last_page=page, grayscale=grayscale)
+    return encode_jpeg(images[0], quality, max_width)
+
+
+# Text layer of the PDF via poppler's pdftotext, which ships alongside the pdftoppm
+# that pdf2image already needs. Scanned resumes without a text layer yield "".
+def extract_text(pdf_bytes, timeout=30):
+    result = subprocess.run(["pdftotext", "-layout", "-", "-"], input=pdf_bytes, capture_output=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors="replace").strip() or "pdftotext failed")
+    return result.stdout.decode("utf-8", errors="replace")
+
+
+# Renders resumes and memoizes the result by content hash and render settings
+class ResumeRenderer:
+    def __init__(self, dpi=RENDER_DPI, grayscale=RENDER_GRAYSCALE, quality=JPEG_QUALITY, max_width=MAX_WIDTH,
+                 max_pages=MAX_PAGES, threads=RENDER_THREADS, max_documents=16):
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self.quality = quality
+        self.max_width = max_width
+        self.max_pages = max(1, int(max_pages))
+        self.threads = max(1, int(threads))
+        self._documents = TieredCache(max_entries=max_documents, ttl_seconds=None)
+
+    # Only the first page unless all_pages is set (up to max_pages)
+    def render(self, pdf_bytes, all_pages=False):
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        key = f"{digest}:{self.dpi}:{int(self.grayscale)}:{self.quality}:{self.max_width}:{self.max_pages if all_pages else 1}"
+        document = self._documents.get(key)
+        if document is not None:
+            return document
+
+        page_count = pdf2image.pdfinfo_from_bytes(pdf_bytes)["Pages"]
+        last_page = min(page_count, self.max_pages) if all_pages else 1
+        render = lambda page: render_page(pdf_bytes, page, self.dpi, self.grayscale, self.quality, self.max_width)
+        if last_page == 1:
+            pages = [render(1)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.threads, last_page)) as pool:
+                pages = list(pool.map(render, range(1, last_page + 1)))
+
+        document = ResumeDocument(digest, pages, page_count)
+        self._documents.set(key, document)
+        return document
+
+    def text(self, pdf_bytes):
+        key = f"{hashlib.sha256(pdf_bytes).hexdigest()}:text"
+        text = self._documents.get(key)
+        if text is None:
+            text = extract_text(pdf_bytes)
+            self._documents.set(key, text)
+        return text
+
+    def stats(self):
+        return self._documents.stats()
@@ -0,0 +1,34 @@
+import hashlib
+import json
+from tiered_cache import TieredCache
+
+
+# Normalize the request so that trivially different inputs share one cache entry
+def normalize_request(career_goal, skills, learning_preference):
+    career_goal = " ".join(str(career_goal).lower().split())
+    learning_preference = " ".join(str(learning_preference).lower().split())
+    skills = sorted({" ".join(str(skill).lower().split()) for skill in skills} - {""})
+    return career_goal, skills, learning_preference
+
+
+# variant distinguishes outputs of the same request under different decoding settings
+def roadmap_key(career_goal, skills, learning_preference, namespace="", variant=""):
+    career_goal, skills, learning_preference = normalize_request(career_goal, skills, learning_preference)
+    payload = json.dumps([namespace, variant, career_goal, skills, learning_preference], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Outputs differ between models and between inference profiles (fp32, bf16, int8),
+# so both are part of the namespace
+def cache_namespace(model_name, profile):
+    return f"{model_name}:{profile}"
+
+
+# Two-tier cache for generated roadmaps (see TieredCache), keyed on the normalized request
+class RoadmapCache(TieredCache):
+    def __init__(self, max_entries=1024, ttl_seconds=24 * 3600, db_path=None, namespace=""):
+        super().__init__(max_entries, ttl_seconds, db_path, table="roadmaps", value_column="roadmap")
+        self.namespace = namespace
+
+    def key(self, career_goal, skills, learning_preference, variant=""):
+        return roadmap_key(career_goal, skills, learning_preference, self.namespace, variant)
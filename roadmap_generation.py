@@ -0,0 +1,101 @@
+import time
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+# Named decoding presets. "quality" keeps the original 4-beam settings and is the default.
+DECODING_PRESETS = {
+    "fast": dict(
+        do_sample=False,
+        num_beams=1,
+        use_cache=True,
+        max_new_tokens=280,
+        no_repeat_ngram_size=2
+    ),
+    "balanced": dict(
+        num_beams=2,
+        early_stopping=True,
+        use_cache=True,
+        max_new_tokens=280,
+        no_repeat_ngram_size=2
+    ),
+    "quality": dict(
+        # A new-token limit, not max_length: with left-padded batches max_length would
+        # count the padding, making the output depend on the batch it ran in
+        max_new_tokens=280,
+        num_beams=4,
+        early_stopping=True,
+        no_repeat_ngram_size=2  # Prevent repetitive outputs
+    ),
+}
+DEFAULT_PRESET = "quality"
+# Streaming needs a preset without beam search
+STREAMING_PRESET = "fast"
+
+
+# Stops generation once a request has used up its token or wall-clock budget, or
+# once should_stop() reports that nobody is waiting for the result any more
+class GenerationBudget(StoppingCriteria):
+    def __init__(self, max_new_tokens=None, max_seconds=None, should_stop=None):
+        self.max_new_tokens = max_new_tokens
+        self.max_seconds = max_seconds
+        self.should_stop = should_stop
+        self.prompt_length = 0
+        self.started = time.monotonic()
+        self.timed_out = False
+
+    def start(self, prompt_length):
+        self.prompt_length = prompt_length
+        self.started = time.monotonic()
+
+    def __call__(self, input_ids, scores, **kwargs):
+        done = False
+        if self.max_new_tokens is not None and input_ids.shape[-1] - self.prompt_length >= self.max_new_tokens:
+            done = True
+        if self.max_seconds is not None and time.monotonic() - self.started >= self.max_seconds:
+            self.timed_out = done = True
+        if self.should_stop is not None and self.should_stop():
+            done = True
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+
+def build_prompt(career_goal, skills, learning_preference):
+    return (
+        f"Career Goal: {career_goal}\n"
+        f"Skills: {', '.join(skills)}\n"
+        f"Learning Preference: {learning_preference}\n"
+        f"Roadmap:"
+    )
+
+
+# Cache variant for outputs produced with these decoding settings
+def decoding_variant(preset, max_new_tokens):
+    return f"{preset}:{max_new_tokens}"
+
+
+def generate_tokens(tokenizer, model, prompts, budget=None, **generation_kwargs):
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+    if budget is not None:
+        budget.start(inputs.input_ids.shape[-1])
+        generation_kwargs["stopping_criteria"] = StoppingCriteriaList([budget])
+        # The budget replaces the preset's token limit, which would otherwise cap it
+        if budget.max_new_tokens is not None:
+            generation_kwargs["max_new_tokens"] = budget.max_new_tokens
+    with torch.inference_mode():
+        outputs = model.generate(
+            inputs.input_ids,
+            attention_mask=inputs.attention_mask,
+            pad_token_id=tokenizer.pad_token_id,
+            **generation_kwargs
+        )
+    return inputs, outputs
+
+
+# Returns the decoded roadmaps and whether the time budget cut generation short
+def generate_roadmaps(tokenizer, model, prompts, preset=DEFAULT_PRESET, max_new_tokens=None, max_seconds=None,
+                      should_stop=None):
+    budget = None
+    if max_new_tokens is not None or max_seconds is not None or should_stop is not None:
+        budget = GenerationBudget(max_new_tokens, max_seconds, should_stop)
+    _, outputs = generate_tokens(tokenizer, model, prompts, budget=budget, **DECODING_PRESETS[preset])
+    timed_out = budget is not None and budget.timed_out
+    return tokenizer.batch_decode(outputs, skip_special_tokens=True), timed_out
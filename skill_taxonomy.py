@@ -0,0 +1,58 @@
+import json
+import re
+import numpy as np
+
+TAXONOMY_PATH = "skill_taxonomy.json"
+
+
+# category -> {"title", "chart", "skills": {canonical skill -> [regex patterns]}}
+def load_taxonomy(path=TAXONOMY_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Assigns skill strings to taxonomy buckets. Each bucket is one (category, canonical
+# skill) pair; a skill string belongs to a bucket if any of its patterns matches.
+class SkillMatcher:
+    def __init__(self, taxonomy):
+        self.taxonomy = taxonomy
+        self.buckets = []
+        self.patterns = []
+        for category, spec in taxonomy.items():
+            for skill, patterns in spec["skills"].items():
+                self.buckets.append((category, skill))
+                self.patterns.append(re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE))
+
+    # Sparse skill x bucket membership in coordinate form: vocabulary[rows[k]] is in
+    # bucket cols[k]. Computed once per vocabulary, not once per chart.
+    def match(self, vocabulary):
+        rows, cols = [], []
+        for row, skill in enumerate(vocabulary):
+            for col, pattern in enumerate(self.patterns):
+                if pattern.search(skill):
+                    rows.append(row)
+                    cols.append(col)
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+    # Multiply the membership matrix by a vector of per-skill counts
+    def bucket_counts(self, membership, skill_counts):
+        rows, cols = membership
+        return np.bincount(cols, weights=np.asarray(skill_counts, dtype=np.float64)[rows], minlength=len(self.buckets))
+
+    # {category: {"title", "chart", "counts": {canonical skill: count}}} in taxonomy order
+    def summarize(self, totals):
+        summary = {
+            category: {"title": spec.get("title", category), "chart": spec.get("chart", "bar"), "counts": {}}
+            for category, spec in self.taxonomy.items()
+        }
+        for (category, skill), total in zip(self.buckets, totals):
+            summary[category]["counts"][skill] = int(total)
+        return summary
+
+
+# Bucket totals for every category of the taxonomy over a JobIndex
+def skill_buckets(job_index, taxonomy):
+    matcher = SkillMatcher(taxonomy)
+    vocabulary = job_index.categories["skills"]
+    totals = matcher.bucket_counts(matcher.match(vocabulary), job_index.counts("skills"))
+    return matcher.summarize(totals)
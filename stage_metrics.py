@@ -0,0 +1,81 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+# Opt-in per-stage latency histograms and counters, rendered in the Prometheus text
+# format. When disabled, time() and count() return without taking the lock.
+class StageMetrics:
+    def __init__(self, enabled=False, prefix="careermind"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            buckets, totals = self._stages.setdefault(stage, ([0] * len(BUCKETS), [0, 0.0]))
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            totals[0] += 1
+            totals[1] += seconds
+
+    @contextmanager
+    def time(self, stage):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    # {stage: {"count", "seconds_total", "seconds_avg"}}
+    def snapshot(self):
+        with self._lock:
+            return {
+                stage: {"count": count, "seconds_total": total, "seconds_avg": total / count if count else 0.0}
+                for stage, (_, (count, total)) in self._stages.items()
+            }
+
+    # Exposition text; gauges is {name: value} for point-in-time values owned elsewhere
+    # (queue depth, ...) and counters the same for cumulative ones (requests served,
+    # cache hits, ...), which are exported with the conventional _total suffix
+    def render(self, gauges=None, counters=None):
+        name = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {name} Time spent per stage.", f"# TYPE {name} histogram"]
+        with self._lock:
+            stages = {stage: (list(buckets), list(totals)) for stage, (buckets, totals) in self._stages.items()}
+            owned = dict(self._counters)
+        for stage, (buckets, (count, total)) in sorted(stages.items()):
+            for bound, value in zip(BUCKETS, buckets):
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {value}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        owned.update({name[:-len("_total")] if name.endswith("_total") else name: value
+                      for name, value in (counters or {}).items()})
+        for counter, value in sorted(owned.items()):
+            lines.append(f"# TYPE {self.prefix}_{counter}_total counter")
+            lines.append(f"{self.prefix}_{counter}_total {value}")
+        for gauge, value in sorted((gauges or {}).items()):
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {self.prefix}_{gauge} gauge")
+                lines.append(f"{self.prefix}_{gauge} {value}")
+        return "\n".join(lines) + "\n"
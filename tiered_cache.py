@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# Two-tier string cache: an in-process LRU with size and TTL eviction, backed by an
+# optional SQLite table that survives restarts. Pinned entries (e.g. precomputed
+# results) never expire; they can still leave the in-process LRU but stay on disk.
+class TieredCache:
+    def __init__(self, max_entries=1024, ttl_seconds=24 * 3600, db_path=None, table="entries", value_column="value"):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds) if ttl_seconds else None
+        self.table = table
+        self.value_column = value_column
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, {value_column} TEXT NOT NULL, "
+                "created REAL NOT NULL, pinned INTEGER NOT NULL DEFAULT 0)"
+            )
+            # Tables created before entries could be pinned
+            columns = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            if "pinned" not in columns:
+                self._db.execute(f"ALTER TABLE {table} ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0")
+            self._db.commit()
+
+    def _expired(self, created, pinned, now):
+        return not pinned and self.ttl is not None and now - created > self.ttl
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created, pinned = entry
+                if not self._expired(created, pinned, now):
+                    self._entries.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT {self.value_column}, created, pinned FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1], row[2], now):
+                    self._remember(key, row[0], row[1], bool(row[2]))
+                    self._stats["disk_hits"] += 1
+                    return row[0]
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value, pinned=False):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now, pinned)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, {self.value_column}, created, pinned) VALUES (?, ?, ?, ?)",
+                    (key, value, now, int(pinned)),
+                )
+                self._db.commit()
+
+    def _remember(self, key, value, created, pinned=False):
+        self._entries[key] = (value, created, pinned)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            stats["ttl_seconds"] = self.ttl
+            stats["disk_enabled"] = self._db is not None
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats